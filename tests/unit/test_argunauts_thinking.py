@@ -0,0 +1,613 @@
+"""Unit tests for the shared helpers of the argunauts-thinking use case.
+
+Several tests compare an optimized helper against a reference copy of the
+straightforward implementation it replaced.
+"""
+
+import copy
+import importlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+USE_CASE_DIR = Path(__file__).resolve().parents[2] / "use-cases" / "argunauts-thinking"
+
+
+@pytest.fixture(scope="module")
+def use_case():
+    """Return an importer for the use-case scripts.
+
+    The scripts import each other as top-level modules, so their directory is
+    put on sys.path for this module's tests only, and the scripts are removed
+    from sys.modules afterwards.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.syspath_prepend(str(USE_CASE_DIR))
+        yield importlib.import_module
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and Path(module_file).resolve().parent == USE_CASE_DIR:
+            del sys.modules[name]
+
+
+@pytest.fixture(scope="module")
+def json_io(use_case):
+    return use_case("json_io")
+
+
+@pytest.fixture(scope="module")
+def dedup_subset(use_case):
+    return use_case("dedup_subset")
+
+
+@pytest.fixture(scope="module")
+def orchestrate(use_case):
+    return use_case("orchestrate_argunauts")
+
+
+@pytest.fixture(scope="module")
+def repair(use_case):
+    return use_case("repair_tool_messages")
+
+
+@pytest.fixture(scope="module")
+def debug_tools(use_case):
+    return use_case("debug_tool_messages")
+
+
+@pytest.fixture(scope="module")
+def validate(use_case):
+    return use_case("validate_structures")
+
+
+RECORDS = [
+    {"example_id": 0, "conversations": [{"role": "user", "content": "hi"}]},
+    {"example_id": 1, "conversations": [{"role": "tool", "content": "{\"a\": 1}"}]},
+]
+
+
+def write_ndjson(path, records):
+    path.write_text("".join(json.dumps(rec) + "\n" for rec in records))
+
+
+@pytest.mark.unit
+def test_is_ndjson_uses_suffix(tmp_path, json_io):
+    """Test that only .jsonl files are treated as NDJSON."""
+    ndjson = tmp_path / "records.jsonl"
+    write_ndjson(ndjson, RECORDS)
+    assert json_io.is_ndjson(ndjson)
+
+    # A one-line object in a .json file is a single object, not one record.
+    single_line = tmp_path / "single_line.json"
+    write_ndjson(single_line, RECORDS[:1])
+    assert not json_io.is_ndjson(single_line)
+
+    array = tmp_path / "array.json"
+    array.write_text(json.dumps(RECORDS, indent=2))
+    assert not json_io.is_ndjson(array)
+
+
+@pytest.mark.unit
+def test_read_records_on_both_formats(tmp_path, json_io):
+    """Test that NDJSON and JSON array files yield the same records."""
+    ndjson = tmp_path / "records.jsonl"
+    write_ndjson(ndjson, RECORDS)
+    array = tmp_path / "array.json"
+    array.write_text(json.dumps(RECORDS))
+
+    assert json_io.read_records(ndjson) == RECORDS
+    assert json_io.read_records(array) == RECORDS
+    assert list(json_io.iter_records(ndjson)) == RECORDS
+    assert list(json_io.iter_records(array)) == RECORDS
+    assert list(json_io.iter_example_ids(ndjson)) == [0, 1]
+    assert list(json_io.iter_example_ids(array)) == [0, 1]
+
+    # A single object is returned as-is rather than split into records.
+    for name, text in [
+        ("single.json", json.dumps(RECORDS[0], indent=2)),
+        ("single_line.json", json.dumps(RECORDS[0]) + "\n"),
+    ]:
+        single = tmp_path / name
+        single.write_text(text)
+        assert json_io.read_records(single) == RECORDS[0]
+
+
+@pytest.mark.unit
+def test_iter_records_rejects_non_list(tmp_path, json_io):
+    """Test that streaming a top-level object fails instead of yielding nothing."""
+    single = tmp_path / "single.json"
+    single.write_text(json.dumps(RECORDS[0], indent=2))
+    with pytest.raises(ValueError, match="Expected list at top level"):
+        list(json_io.iter_records(single))
+    with pytest.raises(ValueError, match="Expected list at top level"):
+        list(json_io.iter_example_ids(single))
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("indent", [True, False])
+def test_write_json_array(tmp_path, indent, json_io):
+    """Test streamed JSON array output for empty and multi-chunk input."""
+    empty = tmp_path / "empty.json"
+    json_io.write_json_array(empty, [], indent=indent)
+    assert json.loads(empty.read_text()) == []
+
+    records = [{"example_id": i, "text": "x" * i} for i in range(50)]
+    out = tmp_path / "out.json"
+    # A tiny chunk size forces many intermediate flushes.
+    json_io.write_json_array(out, iter(records), indent=indent, chunk_size=64)
+    assert json.loads(out.read_text()) == records
+    assert not json_io.is_ndjson(out)
+
+
+@pytest.mark.unit
+def test_drop_torn_tail_truncates_incomplete_last_line(tmp_path, orchestrate, json_io):
+    """Test that a partially written trailing record is dropped."""
+    path = tmp_path / "canonical.jsonl"
+    complete = "".join(json.dumps(rec) + "\n" for rec in RECORDS)
+    path.write_text(complete + '{"example_id": 2, "conv')
+
+    # A small block size makes the backwards scan cross block boundaries.
+    orchestrate.drop_torn_tail(path, block_size=8)
+
+    assert path.read_text() == complete
+    assert json_io.read_records(path) == RECORDS
+
+
+@pytest.mark.unit
+def test_drop_torn_tail_fully_torn_file(tmp_path, orchestrate):
+    """Test that a file without any complete line is emptied."""
+    path = tmp_path / "canonical.jsonl"
+    path.write_text('{"example_id": 0, "conv')
+
+    orchestrate.drop_torn_tail(path, block_size=4)
+
+    assert path.read_bytes() == b""
+
+
+@pytest.mark.unit
+def test_drop_torn_tail_leaves_clean_files_alone(tmp_path, orchestrate):
+    """Test that complete and empty files are not modified."""
+    path = tmp_path / "canonical.jsonl"
+    write_ndjson(path, RECORDS)
+    before = path.read_bytes()
+    orchestrate.drop_torn_tail(path)
+    assert path.read_bytes() == before
+
+    empty = tmp_path / "empty.jsonl"
+    empty.write_bytes(b"")
+    orchestrate.drop_torn_tail(empty)
+    assert empty.read_bytes() == b""
+
+
+@pytest.mark.unit
+def test_content_hash_and_record_hash(dedup_subset):
+    """Test content hashing of message payloads."""
+    conv = [{"role": "user", "content": "hi"}]
+    assert dedup_subset.content_hash(conv) == dedup_subset.content_hash(list(conv))
+    assert dedup_subset.content_hash(conv) != dedup_subset.content_hash(
+        [{"role": "user", "content": "hello"}]
+    )
+
+    # 'messages' is used when there is no 'conversations' key.
+    assert dedup_subset.record_hash({"conversations": conv}) == dedup_subset.content_hash(conv)
+    assert dedup_subset.record_hash({"messages": conv}) == dedup_subset.content_hash(conv)
+
+    # Records without a non-empty message list get no hash.
+    assert dedup_subset.record_hash({"example_id": 1}) is None
+    assert dedup_subset.record_hash({"conversations": None}) is None
+    assert dedup_subset.record_hash({"conversations": []}) is None
+    assert dedup_subset.record_hash({"conversations": "not a list"}) is None
+
+
+@pytest.mark.unit
+def test_group_duplicates(dedup_subset):
+    """Test that duplicates collapse onto their first occurrence."""
+    conv_a = [{"role": "user", "content": "a"}]
+    conv_b = [{"role": "user", "content": "b"}]
+    records = {
+        1: {"conversations": conv_a},
+        2: {"conversations": conv_b},
+        3: {"messages": conv_a},
+        4: {},
+        5: {"conversations": None},
+        6: {"conversations": conv_a},
+    }
+    hash_by_id = {}
+    for ex_id, rec in records.items():
+        h = dedup_subset.record_hash(rec)
+        if h is not None:
+            hash_by_id[ex_id] = h
+
+    reps, duplicates_of = dedup_subset.group_duplicates(records, hash_by_id)
+
+    # Records with missing payloads are never merged with each other.
+    assert reps == [1, 2, 4, 5]
+    assert duplicates_of == {1: [3, 6]}
+
+    assert dedup_subset.group_duplicates([], {}) == ([], {})
+
+
+def baseline_try_parse_json(s):
+    if not isinstance(s, str):
+        return True
+    try:
+        json.loads(s)
+        return True
+    except Exception:
+        return False
+
+
+def baseline_repair_record(raw_rec, cleaned_rec):
+    def get_messages(rec):
+        if "conversations" in rec:
+            return rec["conversations"]
+        if "messages" in rec:
+            return rec["messages"]
+        return []
+
+    repaired = json.loads(json.dumps(cleaned_rec))
+    conv_raw = get_messages(raw_rec)
+    conv_rep = get_messages(repaired)
+    if len(conv_raw) != len(conv_rep):
+        return repaired, False
+    for mr, mc in zip(conv_raw, conv_rep):
+        if mr.get("role") == "tool" and mc.get("role") == "tool":
+            if baseline_try_parse_json(mc.get("content")):
+                continue
+            if baseline_try_parse_json(mr.get("content")):
+                mc["content"] = mr.get("content")
+                mc["name"] = mr.get("name")
+                continue
+            return repaired, False
+    for m in conv_rep:
+        if m.get("role") == "tool" and not baseline_try_parse_json(m.get("content")):
+            return repaired, False
+    return repaired, True
+
+
+def tool(content, name="t"):
+    return {"role": "tool", "name": name, "content": content}
+
+
+USER = {"role": "user", "content": "q"}
+ASSISTANT = {"role": "assistant", "content": "a", "tool_calls": [{"name": "t"}]}
+
+REPAIR_CASES = {
+    "no_tools": ([USER, ASSISTANT], [USER, ASSISTANT]),
+    "valid": ([USER, tool('{"a": 1}')], [USER, tool('{"a": 2}', name="u")]),
+    "repairable": (
+        [USER, tool('{"a": 1}'), tool("[1]")],
+        [USER, tool('{"a"', name="u"), tool("[")],
+    ),
+    "unrepairable": ([USER, tool("{")], [USER, tool("{")]),
+    "raw_not_tool": ([USER, USER], [USER, tool("{")]),
+    "structured_content": ([USER, tool("{")], [USER, tool({"a": 1})]),
+    "length_mismatch": ([USER], [USER, tool("{")]),
+}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("key", ["conversations", "messages"])
+@pytest.mark.parametrize("case", sorted(REPAIR_CASES))
+def test_repair_record_matches_baseline(repair, case, key):
+    """Test that the lazy-copy repair_record matches the deep-copy original."""
+    raw_conv, cleaned_conv = REPAIR_CASES[case]
+    raw_rec = {"example_id": 0, key: raw_conv}
+    cleaned_rec = {"example_id": 0, key: cleaned_conv}
+    before = copy.deepcopy(cleaned_rec)
+
+    repaired, ok = repair.repair_record(raw_rec, cleaned_rec)
+    expected, expected_ok = baseline_repair_record(raw_rec, cleaned_rec)
+
+    assert ok == expected_ok
+    if ok:
+        assert repaired == expected
+    assert cleaned_rec == before
+    if ok and repaired == cleaned_rec:
+        # Nothing was repaired, so no copy was made.
+        assert repaired is cleaned_rec
+    elif ok:
+        # Only the repaired messages are new objects.
+        for new, old in zip(repaired[key], cleaned_rec[key]):
+            assert (new is old) == (new == old)
+
+
+@pytest.mark.unit
+def test_repair_record_without_messages(repair):
+    """Test records that have no message list at all."""
+    rec = {"example_id": 0}
+    assert repair.repair_record({"example_id": 0}, rec) == (rec, True)
+    assert baseline_repair_record({"example_id": 0}, rec) == (rec, True)
+
+
+JSON_SAMPLES = [
+    '{"a": [1, 2.5, "x"]}',
+    "  [1, 2]\n",
+    '"text"',
+    "-1",
+    "0",
+    "1" * 40,
+    "1e999",
+    "NaN",
+    "-Infinity",
+    "true",
+    "false",
+    "null",
+    '"\\ud800"',
+    "",
+    "   ",
+    "{",
+    "[1,",
+    "tru",
+    "1 2",
+    "nan",
+    "plain text",
+    "{} x",
+    "'single'",
+    None,
+    {"a": 1},
+    [1],
+    3,
+]
+
+
+@pytest.mark.unit
+def test_try_parse_json_matches_stdlib(repair, debug_tools):
+    """Test the prefilter and the parse cache against a plain json.loads."""
+    repair._parses_as_json.cache_clear()
+    for _ in range(2):
+        for sample in JSON_SAMPLES:
+            expected = baseline_try_parse_json(sample)
+            assert repair.try_parse_json(sample) is expected, sample
+            assert debug_tools.try_parse_json(sample) is expected, sample
+    # The second round is answered from the cache.
+    assert repair._parses_as_json.cache_info().hits > 0
+
+
+def baseline_round_robin(records, modes, models, indices):
+    combos = [(mode, model) for mode in modes for model in models]
+    assigned = {f"{mode}::{model}": [] for mode, model in combos}
+    for i, idx in enumerate(indices):
+        mode, model = combos[i % len(combos)]
+        ex = dict(records[idx])
+        ex.setdefault("mode", mode)
+        ex.setdefault("model", model)
+        assigned[f"{mode}::{model}"].append(ex)
+    return assigned
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("n", [0, 1, 5, 12, 101])
+def test_balanced_assign_matches_round_robin(use_case, n):
+    """Test that the strided numpy shards equal the original round-robin."""
+    np = pytest.importorskip("numpy")
+    assign = use_case("assign_modes_and_models")
+    modes, models = ["a", "b"], ["m1", "m2", "m3"]
+    records = [{"example_id": i} for i in range(n)]
+    if records:
+        # Existing annotations are kept, as with setdefault before.
+        records[0]["mode"] = "b"
+
+    assigned = assign.balanced_assign(records, modes, models, seed=7, copy=True)
+
+    if not records:
+        assert assigned == {}
+        return
+    perm = np.random.default_rng(7).permutation(n).tolist()
+    assert assigned == baseline_round_robin(records, modes, models, perm)
+    assert "model" not in records[0]
+    sizes = [len(group) for group in assigned.values()]
+    assert max(sizes) - min(sizes) <= 1
+
+    # Without copy, the input records themselves are annotated and shared.
+    in_place = assign.balanced_assign(records, modes, models, seed=7)
+    assert in_place == assigned
+    assert all(any(ex is rec for rec in records) for group in in_place.values() for ex in group)
+
+
+def baseline_compare_example(raw_rec, cleaned_rec):
+    def get_messages(rec):
+        return rec.get("conversations", rec.get("messages", []))
+
+    conv_raw = get_messages(raw_rec)
+    conv_clean = get_messages(cleaned_rec)
+    diffs = {
+        "changed_tool_messages": [],
+        "changed_tool_calls": [],
+        "length_mismatch": None,
+        "raw_tool_json_ok": True,
+        "cleaned_tool_json_ok": True,
+    }
+    if len(conv_raw) != len(conv_clean):
+        diffs["length_mismatch"] = (len(conv_raw), len(conv_clean))
+    for i in range(min(len(conv_raw), len(conv_clean))):
+        mr = conv_raw[i]
+        mc = conv_clean[i]
+        if mr.get("role") == "tool" or mc.get("role") == "tool":
+            if (
+                mr.get("role") != mc.get("role")
+                or mr.get("name") != mc.get("name")
+                or mr.get("content") != mc.get("content")
+            ):
+                diffs["changed_tool_messages"].append((i, mr, mc))
+            if not baseline_try_parse_json(mr.get("content")):
+                diffs["raw_tool_json_ok"] = False
+            if not baseline_try_parse_json(mc.get("content")):
+                diffs["cleaned_tool_json_ok"] = False
+        if mr.get("role") == "assistant" and mc.get("role") == "assistant":
+            if mr.get("tool_calls") != mc.get("tool_calls"):
+                diffs["changed_tool_calls"].append((i, mr.get("tool_calls"), mc.get("tool_calls")))
+    return diffs
+
+
+SHARED_CONV = [USER, ASSISTANT, tool("{")]
+COMPARE_CASES = {
+    "same_object": (SHARED_CONV, SHARED_CONV),
+    "equal_copy": (SHARED_CONV, copy.deepcopy(SHARED_CONV)),
+    "no_tools": ([USER, ASSISTANT], [USER, dict(ASSISTANT, content="b")]),
+    "tool_content": ([USER, tool('{"a": 1}')], [USER, tool("{")]),
+    "tool_name": ([USER, tool("[]")], [USER, tool("[]", name="u")]),
+    "role_changed": ([USER, tool("[]")], [USER, USER]),
+    "tool_calls": ([ASSISTANT], [dict(ASSISTANT, tool_calls=None)]),
+    "trailing_tool": ([USER], [USER, tool("[]")]),
+    "trailing_user": ([USER, USER], [USER]),
+}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("case", sorted(COMPARE_CASES))
+def test_compare_example_matches_baseline(debug_tools, case):
+    """Test the short-circuits in compare_example against the original loop."""
+    raw_conv, cleaned_conv = COMPARE_CASES[case]
+    raw_rec = {"example_id": 0, "conversations": raw_conv}
+    cleaned_rec = {"example_id": 0, "conversations": cleaned_conv}
+
+    diffs = debug_tools.compare_example(0, raw_rec, cleaned_rec, check_json=True)
+
+    has_tool_msg = diffs.pop("has_tool_msg")
+    assert diffs == baseline_compare_example(raw_rec, cleaned_rec)
+    assert has_tool_msg == any(m.get("role") == "tool" for m in raw_conv + cleaned_conv)
+
+    # Without check_json the parseability flags stay True.
+    unchecked = debug_tools.compare_example(0, raw_rec, cleaned_rec, check_json=False)
+    assert unchecked["raw_tool_json_ok"] and unchecked["cleaned_tool_json_ok"]
+
+
+def write_json(path, records):
+    path.write_text(json.dumps(records))
+    return path
+
+
+def conv_record(example_id, *messages):
+    return {"example_id": example_id, "conversations": list(messages)}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("fast", [False, True])
+@pytest.mark.parametrize("strict_ids", [False, True])
+def test_validate_structures_reports_id_and_message_errors(tmp_path, validate, strict_ids, fast):
+    """Test the single-pass id split and the per-message checks."""
+    original = write_json(
+        tmp_path / "original.json",
+        [
+            conv_record(0, USER),
+            conv_record(1, USER, ASSISTANT),
+            conv_record(2, USER, tool("[]")),
+            conv_record(3, USER, ASSISTANT),
+        ],
+    )
+    transformed = write_json(
+        tmp_path / "transformed.json",
+        [
+            conv_record(4, USER),
+            conv_record(3, USER, USER),
+            conv_record(2, USER, tool("[]", name="u")),
+            conv_record(1, dict(USER, content="changed"), ASSISTANT),
+        ],
+    )
+
+    ok, errors, _, _, per_example = validate.validate_structures(
+        original, transformed, strict_ids=strict_ids, fast=fast
+    )
+
+    expected = ["Missing examples in transformed: 0"]
+    if strict_ids:
+        expected.append("Extra examples in transformed (not present in original): 4")
+    name_error = "[example_id=2, msg#1] field 'name' changed: original='t', transformed='u'"
+    role_error = "[example_id=3, msg#1] role mismatch: original='assistant', transformed='user'"
+    keys_error = (
+        "[example_id=3, msg#1] message keys differ: missing_in_transformed=['tool_calls'], "
+        "extra_in_transformed=[]"
+    )
+    calls_error = (
+        "[example_id=3, msg#1] field 'tool_calls' changed: original=[{'name': 't'}], "
+        "transformed=None"
+    )
+    expected += [name_error, keys_error, role_error, calls_error]
+    assert not ok
+    assert errors == expected
+    assert per_example == {2: [name_error], 3: [keys_error, role_error, calls_error]}
+
+    cleaned = tmp_path / "cleaned.json"
+    validate.clean(original, transformed, cleaned, strict_ids=strict_ids, fast=fast)
+    kept = [rec["example_id"] for rec in json.loads(cleaned.read_text())]
+    assert kept == ([1] if strict_ids else [4, 1])
+
+
+@pytest.mark.unit
+def test_structural_fingerprint(tmp_path, validate):
+    """Test that only ids and role sequences feed the fast-path fingerprint."""
+    records = {0: conv_record(0, USER, tool("[]")), 1: conv_record(1, USER)}
+    fingerprint = validate.structural_fingerprint(records)
+
+    reordered = {1: records[1], 0: conv_record(0, dict(USER, content="x"), tool("{", name="u"))}
+    assert validate.structural_fingerprint(reordered) == fingerprint
+
+    assert validate.structural_fingerprint({0: records[0]}) != fingerprint
+    assert validate.structural_fingerprint({**records, 1: conv_record(1, ASSISTANT)}) != fingerprint
+    assert validate.structural_fingerprint({0: {"conversations": None}}) is None
+    assert validate.structural_fingerprint({0: {"conversations": ["text"]}}) is None
+
+    # With matching fingerprints, --fast accepts without comparing messages.
+    original = write_json(tmp_path / "original.json", list(records.values()))
+    transformed = write_json(tmp_path / "transformed.json", list(reordered.values()))
+    assert validate.validate_structures(original, transformed, fast=True)[:2] == (True, [])
+    assert not validate.validate_structures(original, transformed)[0]
+
+
+@pytest.mark.unit
+def test_merge_clean_repair_into_canonical(orchestrate):
+    """Test the overwrite merge and the fan-out to duplicate example_ids."""
+
+    def baseline_merge(canonical_records, repair_clean_records):
+        by_id = {rec["example_id"]: rec for rec in canonical_records if "example_id" in rec}
+        for rec in repair_clean_records:
+            if rec.get("example_id") is not None:
+                by_id[rec["example_id"]] = rec
+        return list(by_id.values())
+
+    canonical = {1: {"example_id": 1, "v": "old"}, 2: {"example_id": 2, "v": "old"}}
+    repaired = [{"example_id": 1, "v": "new"}, {"example_id": 3, "v": "new"}, {"v": "no id"}]
+
+    expected = baseline_merge(list(canonical.values()), repaired)
+    merged_ids = orchestrate.merge_clean_repair_into_canonical(canonical, repaired)
+    assert merged_ids == [1, 3]
+    assert list(canonical.values()) == expected
+
+    # Duplicates receive a copy of their representative under their own id.
+    canonical = {}
+    merged_ids = orchestrate.merge_clean_repair_into_canonical(
+        canonical, repaired, {1: [5, 6], 4: [7]}
+    )
+    assert merged_ids == [1, 3, 5, 6]
+    assert canonical[5] == {"example_id": 5, "v": "new"}
+    assert canonical[6] == {"example_id": 6, "v": "new"}
+    assert canonical[1] is repaired[0] and repaired[0]["example_id"] == 1
+    assert 7 not in canonical
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("extra_field", [False, True])
+def test_merge_by_mask_matches_record_merge(use_case, extra_field):
+    """Test the Arrow-level A/B merge against merging Python records."""
+    pytest.importorskip("datasets")
+    np = pytest.importorskip("numpy")
+    merge = use_case("merge_and_publish_to_hub")
+    from datasets import Dataset
+
+    records_a = [conv_record(i, dict(USER, content=f"a{i}")) for i in range(9)]
+    records_b = [conv_record(i, dict(USER, content=f"b{i}")) for i in range(9)]
+    if extra_field:
+        # Mode B messages carrying an extra key cannot be concatenated as is.
+        for rec in records_b:
+            rec["conversations"][0]["thinking"] = "t"
+    take_b = np.random.default_rng(0).integers(0, 2, size=9).astype(bool)
+
+    merged = merge.merge_by_mask(
+        Dataset.from_list(records_a), Dataset.from_list(records_b), take_b
+    )
+
+    expected = Dataset.from_list([b if t else a for a, b, t in zip(records_a, records_b, take_b)])
+    assert merged.to_list() == expected.to_list()
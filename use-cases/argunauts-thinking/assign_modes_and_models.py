@@ -1,8 +1,11 @@
 import argparse
-import json
-import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from json_io import read_records, write_json_array, write_jsonl
 
 
 def parse_args() -> argparse.Namespace:
@@ -47,17 +50,44 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional random seed for reproducible assignments.",
     )
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help=(
+            "Shallow-copy each record before annotating it with mode/model "
+            "instead of mutating the loaded records in place."
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["json", "ndjson"],
+        default="json",
+        help=(
+            "Output format: an indented JSON array per combination (json) or "
+            "one record per line in a .jsonl file (ndjson)."
+        ),
+    )
     return parser.parse_args()
 
 
 def balanced_assign(
-    records: List[Dict], modes: List[str], models: List[str]
+    records: List[Dict],
+    modes: List[str],
+    models: List[str],
+    seed: Optional[int] = None,
+    copy: bool = False,
 ) -> Dict[str, List[Dict]]:
     """Assign records as evenly as possible across all (mode, model) combos.
 
     We implement a simple round-robin over the Cartesian product of modes and
     models. This keeps the implementation straightforward while ensuring an
-    approximately balanced distribution.
+    approximately balanced distribution. Each combo takes every K-th entry of
+    the shuffled indices as a strided numpy view (no copy, no Python-level
+    modulo), so shard sizes differ by at most one.
+
+    Records are annotated with their mode/model in place unless copy is set,
+    in which case each record is shallow-copied first.
     """
 
     if not records:
@@ -72,17 +102,19 @@ def balanced_assign(
 
     # Shuffle once for fairness so that ordering in the input file does not
     # determine which examples go to which combination.
-    indices = list(range(len(records)))
-    random.shuffle(indices)
-
+    rng = np.random.default_rng(seed)
+    perm = rng.permutation(len(records))
     combo_count = len(combos)
-    for i, idx in enumerate(indices):
-        combo = combos[i % combo_count]
+    shards = [perm[k::combo_count] for k in range(combo_count)]
+
+    for shard, combo in zip(shards, combos):
         key = f"{combo['mode']}::{combo['model']}"
-        ex = dict(records[idx])  # shallow copy so we can annotate
-        ex.setdefault("mode", combo["mode"])
-        ex.setdefault("model", combo["model"])
-        assigned[key].append(ex)
+        group = assigned[key]
+        for idx in shard.tolist():
+            ex = dict(records[idx]) if copy else records[idx]
+            ex.setdefault("mode", combo["mode"])
+            ex.setdefault("model", combo["model"])
+            group.append(ex)
 
     return assigned
 
@@ -93,19 +125,17 @@ def main() -> None:
     input_path = Path(args.input)
     output_dir = Path(args.output_dir)
 
-    if args.seed is not None:
-        random.seed(args.seed)
-
     if not input_path.is_file():
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
-    with input_path.open("r", encoding="utf-8") as f:
-        records = json.load(f)
+    records = read_records(input_path)
 
     if not isinstance(records, list):
         raise ValueError("Input JSON must be a list of records.")
 
-    assigned = balanced_assign(records, args.modes, args.models)
+    assigned = balanced_assign(
+        records, args.modes, args.models, seed=args.seed, copy=args.copy
+    )
 
     # Derive a base stem from the input filename for clearer outputs
     # Example: deepa2-aaac01-thinking_train_raw.json -> deepa2-aaac01-thinking_train
@@ -117,12 +147,23 @@ def main() -> None:
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    for key, group in assigned.items():
+    def write_group(key: str, group: List[Dict]) -> None:
         mode, model = key.split("::", maxsplit=1)
         safe_model = model.replace("/", "-")
-        out_path = output_dir / f"{base}_mode-{mode}_model-{safe_model}.json"
-        with out_path.open("w", encoding="utf-8") as f:
-            json.dump(group, f, ensure_ascii=False, indent=2)
+        if args.format == "ndjson":
+            write_jsonl(output_dir / f"{base}_mode-{mode}_model-{safe_model}.jsonl", group)
+        else:
+            write_json_array(output_dir / f"{base}_mode-{mode}_model-{safe_model}.json", group)
+
+    if not assigned:
+        return
+
+    # One output file per combo; the writes are independent, so overlap them
+    # (the GIL is released around file I/O).
+    with ThreadPoolExecutor(max_workers=len(assigned)) as executor:
+        futures = [executor.submit(write_group, key, group) for key, group in assigned.items()]
+        for future in futures:
+            future.result()
 
 
 if __name__ == "__main__":
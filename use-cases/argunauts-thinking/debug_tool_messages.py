@@ -1,25 +1,29 @@
 #!/usr/bin/env python3
 import json
+import multiprocessing
+import os
+import re
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
+
+from json_io import iter_records, loads
 
 RAW_DIR = Path("data/raw")
 CLEANED_DIR = Path("data/repaired")
 
+# Example: deepa2-aaac01-thinking_train_raw.json -> (deepa2-aaac01-thinking, train)
+RAW_NAME_PATTERN = re.compile(r"^(deepa2-.+-thinking)_([^_]+)_raw\.json$")
+
 # Limit how many concrete diffs we print to keep output manageable
 MAX_DIFFS_PER_FILE = 0
 CONTENT_SNIPPET_LEN = 200
 
+# Parsing every tool message content as JSON dominates the runtime on large
+# files, so the parseability diagnostics are opt-in.
+CHECK_TOOL_JSON = False
 
-def load_json(path: Path) -> List[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
-        raise ValueError(f"Expected list at top level: {path}")
-    return data
 
-
-def index_by_example_id(records: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+def index_by_example_id(records: Iterable[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
     index = {}
     for rec in records:
         eid = rec.get("example_id")
@@ -57,6 +61,13 @@ def try_parse_json(s: Any) -> bool:
     """
     if not isinstance(s, str):
         return True
+    try:
+        loads(s)
+        return True
+    except Exception:
+        pass
+    # orjson rejects some documents the stdlib accepts (NaN/Infinity,
+    # out-of-range floats, lone surrogates), so the stdlib has the final say.
     try:
         json.loads(s)
         return True
@@ -68,13 +79,18 @@ def compare_example(
     eid: Any,
     raw_rec: Dict[str, Any],
     cleaned_rec: Dict[str, Any],
+    check_json: bool = CHECK_TOOL_JSON,
 ) -> Dict[str, Any]:
     """Compare tool messages and tool_calls for a single example.
 
+    The raw/cleaned_tool_json_ok flags are only computed when check_json is
+    set; otherwise they stay True.
+
     Returns a dict with:
       - changed_tool_messages: list of (msg_idx, raw_msg, cleaned_msg)
       - changed_tool_calls: list of (msg_idx, raw_tool_calls, cleaned_tool_calls)
       - length_mismatch: (len_raw, len_cleaned) or None
+      - has_tool_msg: whether either conversation contains a tool message
     """
     conv_raw = get_messages(raw_rec)
     conv_clean = get_messages(cleaned_rec)
@@ -85,36 +101,60 @@ def compare_example(
         "length_mismatch": None,
         "raw_tool_json_ok": True,
         "cleaned_tool_json_ok": True,
+        "has_tool_msg": False,
     }
 
+    if conv_raw is conv_clean or conv_raw == conv_clean:
+        # Identical conversations (the aligner was a no-op): there is nothing
+        # to diff, only the tool-message flags need computing.
+        tool_contents = [m.get("content") for m in conv_raw if m.get("role") == "tool"]
+        diffs["has_tool_msg"] = bool(tool_contents)
+        if check_json and not all(try_parse_json(c) for c in tool_contents):
+            diffs["raw_tool_json_ok"] = diffs["cleaned_tool_json_ok"] = False
+        return diffs
+
     if len(conv_raw) != len(conv_clean):
         diffs["length_mismatch"] = (len(conv_raw), len(conv_clean))
 
     # Compare up to the min length; if lengths differ, that's captured above
-    for i in range(min(len(conv_raw), len(conv_clean))):
+    common = min(len(conv_raw), len(conv_clean))
+    for i in range(common):
         mr = conv_raw[i]
         mc = conv_clean[i]
+        mr_role = mr.get("role")
+        mc_role = mc.get("role")
 
         # Compare tool messages
-        if mr.get("role") == "tool" or mc.get("role") == "tool":
+        if mr_role == "tool" or mc_role == "tool":
+            diffs["has_tool_msg"] = True
             # roles must match if invariants held; we still check explicitly
             if (
-                mr.get("role") != mc.get("role")
+                mr_role != mc_role
                 or mr.get("name") != mc.get("name")
                 or mr.get("content") != mc.get("content")
             ):
                 diffs["changed_tool_messages"].append((i, mr, mc))
 
             # Track JSON parseability for diagnostics
-            if not try_parse_json(mr.get("content")):
-                diffs["raw_tool_json_ok"] = False
-            if not try_parse_json(mc.get("content")):
-                diffs["cleaned_tool_json_ok"] = False
+            if check_json:
+                if not try_parse_json(mr.get("content")):
+                    diffs["raw_tool_json_ok"] = False
+                if not try_parse_json(mc.get("content")):
+                    diffs["cleaned_tool_json_ok"] = False
 
         # Compare tool_calls on assistant messages
-        if mr.get("role") == "assistant" and mc.get("role") == "assistant":
-            if mr.get("tool_calls") != mc.get("tool_calls"):
-                diffs["changed_tool_calls"].append((i, mr.get("tool_calls"), mc.get("tool_calls")))
+        if mr_role == "assistant" and mc_role == "assistant":
+            tr = mr.get("tool_calls")
+            tc = mc.get("tool_calls")
+            # Identity check first: unchanged records often share the same
+            # objects, and list/dict equality is already a C-level walk.
+            if tr is not tc and tr != tc:
+                diffs["changed_tool_calls"].append((i, tr, tc))
+
+    # Messages past the common prefix only matter for tool-message detection.
+    if not diffs["has_tool_msg"]:
+        longer = conv_raw if len(conv_raw) > common else conv_clean
+        diffs["has_tool_msg"] = any(m.get("role") == "tool" for m in longer[common:])
 
     return diffs
 
@@ -122,132 +162,148 @@ def compare_example(
 def find_file_pairs() -> List[Tuple[Path, Path, str, str]]:
     """Return list of (raw_path, cleaned_path, config, split)."""
     pairs = []
-    for raw_path in sorted(RAW_DIR.glob("deepa2-*-thinking_*_raw.json")):
-        name = raw_path.name
-        # Example: deepa2-aaac01-thinking_train_raw.json
-        #          deepa2-aaac01-thinking_validation_raw.json
-        #          deepa2-aaac01-thinking_test_raw.json
-        base = name[: -len("_raw.json")]  # deepa2-aaac01-thinking_train
-        if "_" not in base:
+    # List the cleaned directory once instead of stat-ing every candidate.
+    cleaned_names = set(os.listdir(CLEANED_DIR)) if CLEANED_DIR.is_dir() else set()
+    raw_names = sorted(os.listdir(RAW_DIR)) if RAW_DIR.is_dir() else []
+    for name in raw_names:
+        m = RAW_NAME_PATTERN.match(name)
+        if m is None:
             continue
-        config, split = base.rsplit("_", 1)
+        config, split = m.group(1), m.group(2)
+        raw_path = RAW_DIR / name
         cleaned_name = f"{config}-aligned_{split}.json"
         cleaned_path = CLEANED_DIR / cleaned_name
-        if cleaned_path.exists():
+        if cleaned_name in cleaned_names:
             pairs.append((raw_path, cleaned_path, config, split))
         else:
             print(f"[WARN] No cleaned file for {raw_path} (expected {cleaned_path})")
     return pairs
 
 
+def process_pair(pair: Tuple[Path, Path, str, str]) -> str:
+    """Compare one (raw, cleaned) file pair and return its report text."""
+    raw_path, cleaned_path, config, split = pair
+    lines: List[str] = []
+    out = lines.append
+
+    out(f"\n=== Config: {config} | Split: {split} ===")
+    out(f"Raw:     {raw_path}")
+    out(f"Cleaned: {cleaned_path}")
+
+    raw_index = index_by_example_id(iter_records(raw_path))
+    cleaned_index = index_by_example_id(iter_records(cleaned_path))
+
+    # Both indexes are built in file order, so iterating them directly is
+    # already deterministic and avoids sorting the id space.
+    shared_ids = [eid for eid in raw_index if eid in cleaned_index]
+    only_raw = [eid for eid in raw_index if eid not in cleaned_index]
+    only_cleaned = [eid for eid in cleaned_index if eid not in raw_index]
+
+    out(f"Total raw examples:     {len(raw_index)}")
+    out(f"Total cleaned examples: {len(cleaned_index)}")
+    out(f"Shared example_ids:     {len(shared_ids)}")
+    if only_raw:
+        out(f"Example_ids only in raw:     {len(only_raw)} (e.g. {only_raw[:5]})")
+    if only_cleaned:
+        out(f"Example_ids only in cleaned: {len(only_cleaned)} (e.g. {only_cleaned[:5]})")
+
+    examples_with_tool = 0
+    examples_identical_tool = 0
+    examples_changed_tool = 0
+    examples_changed_calls = 0
+    length_mismatches = 0
+    raw_tool_json_broken = 0
+    cleaned_tool_json_broken = 0
+
+    printed_diffs = 0
+
+    for eid in shared_ids:
+        raw_rec = raw_index[eid]
+        cleaned_rec = cleaned_index[eid]
+
+        diffs = compare_example(eid, raw_rec, cleaned_rec)
+        has_tool_msg = diffs["has_tool_msg"]
+
+        if has_tool_msg:
+            examples_with_tool += 1
+
+        changed_tool = bool(diffs["changed_tool_messages"])
+        changed_calls = bool(diffs["changed_tool_calls"])
+
+        if diffs["length_mismatch"] is not None:
+            length_mismatches += 1
+
+        if not diffs["raw_tool_json_ok"]:
+            raw_tool_json_broken += 1
+        if not diffs["cleaned_tool_json_ok"]:
+            cleaned_tool_json_broken += 1
+
+        if (
+            has_tool_msg
+            and not changed_tool
+            and not changed_calls
+            and diffs["length_mismatch"] is None
+        ):
+            examples_identical_tool += 1
+
+        if changed_tool:
+            examples_changed_tool += 1
+        if changed_calls:
+            examples_changed_calls += 1
+
+        # Report concrete differences for a limited number of examples
+        if (
+            changed_tool or changed_calls or diffs["length_mismatch"] is not None
+        ) and printed_diffs < MAX_DIFFS_PER_FILE:
+            out(f"\n--- example_id={eid} ---")
+            if diffs["length_mismatch"] is not None:
+                lr, lc = diffs["length_mismatch"]
+                out(f"  [LENGTH] conversations length raw={lr}, cleaned={lc}")
+
+            for idx, mr, mc in diffs["changed_tool_messages"]:
+                out(f"  [TOOL MSG] message index {idx}")
+                out(f"    raw.role={mr.get('role')}, cleaned.role={mc.get('role')}")
+                out(f"    raw.name={mr.get('name')}, cleaned.name={mc.get('name')}")
+                out(f"    raw.content:     {snippet(mr.get('content'))}")
+                out(f"    cleaned.content: {snippet(mc.get('content'))}")
+
+            for idx, tr, tc in diffs["changed_tool_calls"]:
+                out(f"  [TOOL CALLS] assistant message index {idx}")
+                out(f"    raw.tool_calls:     {snippet(tr)}")
+                out(f"    cleaned.tool_calls: {snippet(tc)}")
+
+            printed_diffs += 1
+
+    out("\nSummary for this file pair:")
+    out(f"  Examples with any tool messages:        {examples_with_tool}")
+    out(f"  Examples with identical tool payloads:  {examples_identical_tool}")
+    out(f"  Examples with changed tool messages:    {examples_changed_tool}")
+    out(f"  Examples with changed tool_calls:       {examples_changed_calls}")
+    out(f"  Examples with length mismatches:        {length_mismatches}")
+    if CHECK_TOOL_JSON:
+        out(f"  Examples with non-JSON raw tool content:     {raw_tool_json_broken}")
+        out(f"  Examples with non-JSON cleaned tool content: {cleaned_tool_json_broken}")
+    else:
+        out("  (tool content JSON checks disabled; set CHECK_TOOL_JSON = True)")
+    if printed_diffs >= MAX_DIFFS_PER_FILE:
+        out(f"  (diff output truncated at {MAX_DIFFS_PER_FILE} examples)")
+
+    return "\n".join(lines)
+
+
 def main() -> None:
     pairs = find_file_pairs()
     if not pairs:
         print("No raw/cleaned file pairs found.")
         return
 
-    for raw_path, cleaned_path, config, split in pairs:
-        print(f"\n=== Config: {config} | Split: {split} ===")
-        print(f"Raw:     {raw_path}")
-        print(f"Cleaned: {cleaned_path}")
-
-        raw_records = load_json(raw_path)
-        cleaned_records = load_json(cleaned_path)
-
-        raw_index = index_by_example_id(raw_records)
-        cleaned_index = index_by_example_id(cleaned_records)
-
-        shared_ids = sorted(set(raw_index.keys()) & set(cleaned_index.keys()))
-        only_raw = sorted(set(raw_index.keys()) - set(cleaned_index.keys()))
-        only_cleaned = sorted(set(cleaned_index.keys()) - set(raw_index.keys()))
-
-        print(f"Total raw examples:     {len(raw_records)}")
-        print(f"Total cleaned examples: {len(cleaned_records)}")
-        print(f"Shared example_ids:     {len(shared_ids)}")
-        if only_raw:
-            print(f"Example_ids only in raw:     {len(only_raw)} (e.g. {only_raw[:5]})")
-        if only_cleaned:
-            print(f"Example_ids only in cleaned: {len(only_cleaned)} (e.g. {only_cleaned[:5]})")
-
-        examples_with_tool = 0
-        examples_identical_tool = 0
-        examples_changed_tool = 0
-        examples_changed_calls = 0
-        length_mismatches = 0
-        raw_tool_json_broken = 0
-        cleaned_tool_json_broken = 0
-
-        printed_diffs = 0
-
-        for eid in shared_ids:
-            raw_rec = raw_index[eid]
-            cleaned_rec = cleaned_index[eid]
-
-            diffs = compare_example(eid, raw_rec, cleaned_rec)
-            has_tool_msg = any(m.get("role") == "tool" for m in get_messages(raw_rec)) or any(
-                m.get("role") == "tool" for m in get_messages(cleaned_rec)
-            )
-
-            if has_tool_msg:
-                examples_with_tool += 1
-
-            changed_tool = bool(diffs["changed_tool_messages"])
-            changed_calls = bool(diffs["changed_tool_calls"])
-
-            if diffs["length_mismatch"] is not None:
-                length_mismatches += 1
-
-            if not diffs["raw_tool_json_ok"]:
-                raw_tool_json_broken += 1
-            if not diffs["cleaned_tool_json_ok"]:
-                cleaned_tool_json_broken += 1
-
-            if (
-                has_tool_msg
-                and not changed_tool
-                and not changed_calls
-                and diffs["length_mismatch"] is None
-            ):
-                examples_identical_tool += 1
-
-            if changed_tool:
-                examples_changed_tool += 1
-            if changed_calls:
-                examples_changed_calls += 1
-
-            # Print concrete differences for a limited number of examples
-            if (
-                changed_tool or changed_calls or diffs["length_mismatch"] is not None
-            ) and printed_diffs < MAX_DIFFS_PER_FILE:
-                print(f"\n--- example_id={eid} ---")
-                if diffs["length_mismatch"] is not None:
-                    lr, lc = diffs["length_mismatch"]
-                    print(f"  [LENGTH] conversations length raw={lr}, cleaned={lc}")
-
-                for idx, mr, mc in diffs["changed_tool_messages"]:
-                    print(f"  [TOOL MSG] message index {idx}")
-                    print(f"    raw.role={mr.get('role')}, cleaned.role={mc.get('role')}")
-                    print(f"    raw.name={mr.get('name')}, cleaned.name={mc.get('name')}")
-                    print("    raw.content:    ", snippet(mr.get("content")))
-                    print("    cleaned.content:", snippet(mc.get("content")))
-
-                for idx, tr, tc in diffs["changed_tool_calls"]:
-                    print(f"  [TOOL CALLS] assistant message index {idx}")
-                    print("    raw.tool_calls:    ", snippet(tr))
-                    print("    cleaned.tool_calls:", snippet(tc))
-
-                printed_diffs += 1
-
-        print("\nSummary for this file pair:")
-        print(f"  Examples with any tool messages:        {examples_with_tool}")
-        print(f"  Examples with identical tool payloads:  {examples_identical_tool}")
-        print(f"  Examples with changed tool messages:    {examples_changed_tool}")
-        print(f"  Examples with changed tool_calls:       {examples_changed_calls}")
-        print(f"  Examples with length mismatches:        {length_mismatches}")
-        print(f"  Examples with non-JSON raw tool content:     {raw_tool_json_broken}")
-        print(f"  Examples with non-JSON cleaned tool content: {cleaned_tool_json_broken}")
-        if printed_diffs >= MAX_DIFFS_PER_FILE:
-            print(f"  (diff output truncated at {MAX_DIFFS_PER_FILE} examples)")
+    # File pairs are independent, so compare them in worker processes. imap
+    # keeps the reports in discovery order. We use "spawn" so workers do not
+    # inherit the parent's memory via fork.
+    processes = min(len(pairs), os.cpu_count() or 1)
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        for report in pool.imap(process_pair, pairs):
+            print(report)
 
 
 if __name__ == "__main__":
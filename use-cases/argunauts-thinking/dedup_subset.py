@@ -0,0 +1,95 @@
+import argparse
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from json_io import dumps, iter_records
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Report examples in a raw subset whose conversations are identical "
+            "(by content hash)."
+        )
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        required=True,
+        help="Raw subset file (JSON array, or NDJSON with a .jsonl suffix).",
+    )
+    return parser.parse_args()
+
+
+def content_hash(conversations: Any) -> str:
+    """Return a short, stable hash of a conversations payload."""
+    return hashlib.blake2b(dumps(conversations, indent=False), digest_size=16).hexdigest()
+
+
+def record_hash(rec: Dict[str, Any]) -> Optional[str]:
+    """Return the content hash of a record's messages, or None if it has none.
+
+    Messages are looked up like elsewhere in the pipeline: 'conversations'
+    first, then 'messages'. Records without a non-empty message list get no
+    hash, so they are never treated as duplicates of each other.
+    """
+    if "conversations" in rec:
+        payload = rec["conversations"]
+    else:
+        payload = rec.get("messages")
+    if not isinstance(payload, list) or not payload:
+        return None
+    return content_hash(payload)
+
+
+def group_duplicates(
+    example_ids: Iterable[Any],
+    hash_by_id: Dict[Any, str],
+) -> Tuple[List[Any], Dict[Any, List[Any]]]:
+    """Collapse example_ids that share a content hash.
+
+    Returns the representative ids (first occurrence of each hash, in input
+    order) and a mapping from each representative to the ids it stands for.
+    Ids missing from hash_by_id are always their own representatives.
+    """
+    rep_by_hash: Dict[str, Any] = {}
+    representatives: List[Any] = []
+    duplicates_of: Dict[Any, List[Any]] = {}
+    for ex_id in example_ids:
+        h = hash_by_id.get(ex_id)
+        if h is None:
+            representatives.append(ex_id)
+            continue
+        rep = rep_by_hash.get(h)
+        if rep is None:
+            rep_by_hash[h] = ex_id
+            representatives.append(ex_id)
+        else:
+            duplicates_of.setdefault(rep, []).append(ex_id)
+    return representatives, duplicates_of
+
+
+def main() -> None:
+    args = parse_args()
+    input_path = Path(args.input)
+
+    example_ids: List[Any] = []
+    hash_by_id: Dict[Any, str] = {}
+    for idx, rec in enumerate(iter_records(input_path)):
+        ex_id = rec.get("example_id", idx)
+        example_ids.append(ex_id)
+        h = record_hash(rec)
+        if h is not None:
+            hash_by_id[ex_id] = h
+
+    representatives, duplicates_of = group_duplicates(example_ids, hash_by_id)
+    print(
+        f"{input_path}: {len(example_ids)} examples, {len(representatives)} unique conversations."
+    )
+    for rep, dups in duplicates_of.items():
+        print(f"  {rep!r} duplicated by {dups!r}")
+
+
+if __name__ == "__main__":
+    main()
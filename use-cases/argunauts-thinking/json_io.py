@@ -0,0 +1,192 @@
+"""JSON helpers shared by the argunauts-thinking scripts.
+
+orjson is used when it is installed; otherwise we fall back to the stdlib
+json module so the scripts keep working without the extra dependency. ijson
+is likewise optional and only used to stream large JSON arrays.
+"""
+
+import io
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON document from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = True) -> bytes:
+    """Serialize obj to UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def read_json(path: Path) -> Any:
+    """Read and parse a JSON file.
+
+    With orjson the file is parsed directly from a read-only memory map, which
+    avoids copying the whole file into a bytes object first.
+    """
+    if orjson is None:
+        return loads(path.read_bytes())
+    with path.open("rb") as fh:
+        try:
+            buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file; let the parser report it
+            return loads(b"")
+        with buf, memoryview(buf) as view:
+            return orjson.loads(view)
+
+
+def _first_byte(path: Path) -> bytes:
+    """Return the first non-whitespace byte of path, or b"" if there is none."""
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(4096), b""):
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[:1]
+    return b""
+
+
+def _check_array(path: Path) -> None:
+    """Raise ValueError unless path starts (after whitespace) with a JSON array.
+
+    ijson.items(fh, "item") silently yields nothing for any other top-level
+    value, so this keeps the ijson paths as strict as the full parse.
+    """
+    if _first_byte(path) != b"[":
+        raise ValueError(f"Expected list at top level: {path}")
+
+
+def is_ndjson(path: Path) -> bool:
+    """Return True if path holds newline-delimited JSON records.
+
+    The format is decided by suffix alone: .jsonl files are NDJSON and every
+    other file is a JSON array. Sniffing the content cannot tell a one-record
+    NDJSON file from a single JSON object, which must not load as a dataset.
+    """
+    return path.suffix == ".jsonl"
+
+
+def read_records(path: Path) -> List[Any]:
+    """Read all records from a JSON array or NDJSON file (see is_ndjson).
+
+    A JSON file is returned as parsed, so callers can reject non-list data.
+    """
+    if is_ndjson(path):
+        return list(iter_jsonl(path))
+    return read_json(path)
+
+
+def write_json(path: Path, obj: Any, indent: bool = True) -> None:
+    """Serialize obj and write it to path in a single call."""
+    path.write_bytes(dumps(obj, indent=indent))
+
+
+def iter_example_ids(path: Path) -> Iterator[Any]:
+    """Yield the example_id of every record in a JSON array or NDJSON file.
+
+    For JSON arrays with ijson available, only the example_id values are
+    materialized, never the (potentially large) conversation bodies.
+    Otherwise every record body is still parsed: NDJSON line by line, and
+    arrays without ijson as a whole. Records without an example_id are
+    skipped.
+    """
+    if ijson is not None and not is_ndjson(path):
+        _check_array(path)
+        with path.open("rb") as fh:
+            yield from ijson.items(fh, "item.example_id", use_float=True)
+        return
+    for rec in iter_records(path):
+        if "example_id" in rec:
+            yield rec["example_id"]
+
+
+def write_json_array(
+    path: Path,
+    records: Iterable[Any],
+    indent: bool = True,
+    chunk_size: int = 1 << 20,
+) -> None:
+    """Write records as a JSON array without encoding the whole list at once.
+
+    Records are encoded one at a time into an in-memory buffer that is flushed
+    with a single write whenever it exceeds chunk_size bytes, so memory stays
+    bounded by one record plus the buffer.
+    """
+    buf = io.BytesIO()
+    with path.open("wb") as fh:
+        buf.write(b"[")
+        for i, rec in enumerate(records):
+            buf.write(b",\n" if i else b"\n")
+            buf.write(dumps(rec, indent=indent))
+            if buf.tell() > chunk_size:
+                fh.write(buf.getbuffer())
+                buf.seek(0)
+                buf.truncate()
+        buf.write(b"\n]")
+        fh.write(buf.getbuffer())
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield records from a newline-delimited JSON file one at a time."""
+    with path.open("rb") as fh:
+        for line in fh:
+            if line.strip():
+                yield loads(line)
+
+
+def iter_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a JSON array or NDJSON file one at a time.
+
+    NDJSON files are read line by line. JSON arrays are stream-parsed with
+    ijson when it is available so that only one record is held in memory at
+    a time; without ijson the whole file is parsed up front.
+    """
+    if is_ndjson(path):
+        yield from iter_jsonl(path)
+        return
+    if ijson is not None:
+        _check_array(path)
+        with path.open("rb") as fh:
+            yield from ijson.items(fh, "item", use_float=True)
+        return
+    data = read_json(path)
+    if not isinstance(data, list):
+        raise ValueError(f"Expected list at top level: {path}")
+    yield from data
+
+
+def write_jsonl(path: Path, records: Iterable[Dict[str, Any]]) -> None:
+    """Write records as newline-delimited JSON, one compact record per line."""
+    with path.open("wb", buffering=1 << 20) as fh:
+        for rec in records:
+            fh.write(dumps(rec, indent=False))
+            fh.write(b"\n")
+
+
+def append_jsonl(path: Path, records: Iterable[Dict[str, Any]]) -> None:
+    """Append records to a newline-delimited JSON file with a single write."""
+    data = b"".join(dumps(rec, indent=False) + b"\n" for rec in records)
+    with path.open("ab") as fh:
+        fh.write(data)
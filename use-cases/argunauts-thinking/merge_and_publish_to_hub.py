@@ -1,9 +1,11 @@
 import argparse
 from pathlib import Path
-from typing import Dict, List
-import random
+from typing import Dict, List, Optional
 
-from datasets import Dataset, DatasetDict
+import numpy as np
+from datasets import Dataset, DatasetDict, concatenate_datasets
+
+from json_io import read_json
 
 
 def parse_args() -> argparse.Namespace:
@@ -42,6 +44,16 @@ def parse_args() -> argparse.Namespace:
             "will be reproducible."
         ),
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help=(
+            "Optional directory for Parquet copies of the aligned splits. "
+            "Later runs (e.g. retried pushes) load these instead of "
+            "re-parsing the JSON files, as long as they are newer than the source."
+        ),
+    )
     return parser.parse_args()
 
 
@@ -49,10 +61,64 @@ def load_aligned_json(script_dir: Path, mode: str, split: str) -> List[Dict]:
     path = script_dir / f"aligned_mode_{mode}_{split}.json"
     if not path.exists():
         raise FileNotFoundError(f"Aligned file not found for mode {mode}, split {split}: {path}")
-    import json
-
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(path)
+
+
+def load_aligned_dataset(
+    script_dir: Path, mode: str, split: str, cache_dir: Optional[Path] = None
+) -> Dataset:
+    """Load an aligned split as a Dataset.
+
+    NDJSON files (aligned_mode_<mode>_<split>.jsonl) are preferred and read
+    with the Arrow JSON reader; otherwise we fall back to the JSON array file.
+    If cache_dir is given, the result is also stored there as Parquet and
+    reused on later runs while it is newer than the source file.
+    """
+    jsonl_path = script_dir / f"aligned_mode_{mode}_{split}.jsonl"
+    source_path = jsonl_path if jsonl_path.exists() else jsonl_path.with_suffix(".json")
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = cache_dir / f"{split}_{mode}.parquet"
+        if (
+            cache_path.exists()
+            and source_path.exists()
+            and cache_path.stat().st_mtime >= source_path.stat().st_mtime
+        ):
+            return Dataset.from_parquet(str(cache_path))
+
+    if source_path == jsonl_path:
+        ds = Dataset.from_json(str(jsonl_path))
+    else:
+        ds = Dataset.from_list(load_aligned_json(script_dir, mode, split))
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        ds.to_parquet(str(cache_path))
+    return ds
+
+
+def merge_by_mask(ds_a: Dataset, ds_b: Dataset, take_b: np.ndarray) -> Dataset:
+    """Take row i from ds_b where take_b[i] is set and from ds_a otherwise.
+
+    Rows are gathered at the Arrow level and put back in their original
+    positions. If the two datasets' features cannot be aligned (e.g. Mode A
+    and Mode B outputs with different message keys or column types), the
+    rows are merged as Python records instead and Dataset.from_list infers a
+    unified schema, as the record-level merge always did.
+    """
+    idx_a = np.flatnonzero(~take_b)
+    idx_b = np.flatnonzero(take_b)
+    try:
+        merged = concatenate_datasets([ds_a.select(idx_a), ds_b.select(idx_b)])
+    except (ValueError, TypeError):
+        print("Mode A and Mode B features cannot be aligned; merging records instead.")
+        rows_a = ds_a.to_list()
+        rows_b = ds_b.to_list()
+        return Dataset.from_list(
+            [rows_b[i] if b else rows_a[i] for i, b in enumerate(take_b.tolist())]
+        )
+    return merged.select(np.argsort(np.concatenate([idx_a, idx_b]), kind="stable"))
 
 
 def main() -> None:
@@ -61,7 +127,8 @@ def main() -> None:
 
     if args.seed is not None:
         print(f"Seeding RNG with seed={args.seed} for merge policy")
-        random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
 
     repo_id = f"{args.org}/{args.repo_name}"
     print(f"Target Hugging Face dataset: {repo_id}")
@@ -73,27 +140,20 @@ def main() -> None:
     for split in args.splits:
         print(f"Processing split: {split}")
 
-        records_a = load_aligned_json(script_dir, mode="a", split=split)
-        records_b = load_aligned_json(script_dir, mode="b", split=split)
+        ds_a = load_aligned_dataset(script_dir, mode="a", split=split, cache_dir=cache_dir)
+        ds_b = load_aligned_dataset(script_dir, mode="b", split=split, cache_dir=cache_dir)
 
-        if len(records_a) != len(records_b):
+        if len(ds_a) != len(ds_b):
             raise ValueError(
-                f"Split {split}: Mode A has {len(records_a)} examples, "
-                f"Mode B has {len(records_b)} examples. Lengths must match for merging by position."
+                f"Split {split}: Mode A has {len(ds_a)} examples, "
+                f"Mode B has {len(ds_b)} examples. Lengths must match for merging by position."
             )
 
-        ds_a = Dataset.from_list(records_a)
-        ds_b = Dataset.from_list(records_b)
-
         # Merge policy: randomly choose Mode A or Mode B per example.
         # This keeps exactly one aligned conversation per original example,
         # while mixing both alignment strategies across the dataset.
-        merged_records = []
-        for ex_a, ex_b in zip(records_a, records_b):
-            choice = random.choice([ex_a, ex_b])
-            merged_records.append(choice)
-
-        ds_merged = Dataset.from_list(merged_records)
+        take_b = rng.integers(0, 2, size=len(ds_a)).astype(bool)
+        ds_merged = merge_by_mask(ds_a, ds_b, take_b)
 
         dd_mode_a[split] = ds_a
         dd_mode_b[split] = ds_b
@@ -1,7 +1,12 @@
 import argparse
-import json
+import itertools
+import multiprocessing
+import os
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Set
+
+from json_io import read_records, write_json_array, write_jsonl
 
 
 def parse_args() -> argparse.Namespace:
@@ -35,31 +40,73 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Path to write the merged aligned JSON for this (config, split).",
     )
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["json", "ndjson"],
+        default="json",
+        help=(
+            "Output format: an indented JSON array (json) or one record per "
+            "line (ndjson). ndjson output needs a .jsonl path to be read back."
+        ),
+    )
     return parser.parse_args()
 
 
+def _walk_json_files(root: str) -> Iterator[str]:
+    """Recursively yield .json/.jsonl file paths below root.
+
+    os.scandir exposes cached file-type information on each DirEntry, which
+    avoids the extra stat calls Path.rglob makes per entry. Like rglob, the
+    walk does not descend into symlinked directories, so a symlink loop
+    cannot recurse forever.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_json_files(entry.path)
+            elif entry.is_file() and entry.name.endswith((".json", ".jsonl")):
+                yield entry.path
+
+
 def discover_group_files(input_root: Path, config: str, split: str) -> List[Path]:
     """Discover all aligned JSON files for a given (config, split).
 
     Expected layout: input_root/config/split/mode-*_model-*/<file>.json
-    We keep it simple and include all .json files found under that directory.
+    We keep it simple and include all .json and .jsonl files found under that
+    directory. .jsonl is needed because the orchestrator keeps each group's
+    canonical store as <base>_enhanced.jsonl.
     """
 
     base_dir = input_root / config / split
     if not base_dir.exists():
         raise FileNotFoundError(f"Aligned directory not found for {config}/{split}: {base_dir}")
 
-    return sorted(base_dir.rglob("*.json"))
+    return [Path(p) for p in sorted(_walk_json_files(str(base_dir)))]
 
 
 def load_records(path: Path) -> List[Dict]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_records(path)
     if not isinstance(data, list):
         raise ValueError(f"Aligned file must contain a list of records: {path}")
     return data
 
 
+def validate_ids(records: List[Dict], seen_ids: Set[Any], path: Path) -> None:
+    """Record the example_ids of one group file, failing on duplicates."""
+    for ex in records:
+        ex_id = ex.get("example_id")
+        if ex_id is not None:
+            # A single add + size check probes the set once per record.
+            before = len(seen_ids)
+            seen_ids.add(ex_id)
+            if len(seen_ids) == before:
+                raise ValueError(
+                    f"Duplicate example_id {ex_id!r} encountered when merging {path}. "
+                    "This suggests overlapping assignments across groups."
+                )
+
+
 def main() -> None:
     args = parse_args()
 
@@ -72,25 +119,32 @@ def main() -> None:
             f"No aligned JSON files found for config={args.config}, split={args.split}."
         )
 
-    all_records: List[Dict] = []
-    seen_ids = set()
-
-    for path in group_files:
-        records = load_records(path)
-        for ex in records:
-            ex_id = ex.get("example_id")
-            if ex_id is not None and ex_id in seen_ids:
-                raise ValueError(
-                    f"Duplicate example_id {ex_id!r} encountered when merging {path}. "
-                    "This suggests overlapping assignments across groups."
-                )
-            if ex_id is not None:
-                seen_ids.add(ex_id)
-            all_records.append(ex)
+    chunks: List[List[Dict]] = []
+    seen_ids: Set[Any] = set()
+
+    # Group files are independent, so several of them are decoded in worker
+    # processes while the parent runs the duplicate check as results arrive
+    # (in file order). Each record list is pickled back to the parent, so a
+    # single file (or a single CPU) gains nothing from a pool: load in-process.
+    processes = min(len(group_files), os.cpu_count() or 1)
+    with ExitStack() as stack:
+        if processes > 1:
+            pool = stack.enter_context(multiprocessing.get_context("spawn").Pool(processes))
+            loaded: Iterator[List[Dict]] = pool.imap(load_records, group_files)
+        else:
+            loaded = map(load_records, group_files)
+        for path, records in zip(group_files, loaded):
+            validate_ids(records, seen_ids, path)
+            chunks.append(records)
+
+    # The writers accept any iterable, so the chunks are never concatenated.
+    all_records = itertools.chain.from_iterable(chunks)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as f:
-        json.dump(all_records, f, ensure_ascii=False, indent=2)
+    if args.format == "ndjson":
+        write_jsonl(output_path, all_records)
+    else:
+        write_json_array(output_path, all_records)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
 import argparse
-import json
+import multiprocessing
 import os
+import shutil
 import subprocess
-from concurrent.futures import ThreadPoolExecutor
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from dotenv import load_dotenv
 
+import dedup_subset
+import sdkit_worker
+import validate_structures
+from json_io import append_jsonl, iter_example_ids, read_records, write_json, write_jsonl
+
 DEFAULT_CONFIGS: List[str] = [
     "deepa2-aaac01-thinking",
     "deepa2-aaac02-thinking",
@@ -45,6 +53,15 @@ class OrchestratorConfig:
     # Max number of (mode, model) groups to process in parallel
     max_group_workers: int = 4
 
+    # Max number of (config, split) pipelines to run in parallel
+    max_outer_workers: int = 2
+
+    # Run validate_structures.py as a subprocess instead of in-process
+    subprocess_validate: bool = False
+
+    # Launch the synthetic-data-kit CLI per batch instead of calling it in-process
+    subprocess_sdkit: bool = False
+
     script_dir: Path = field(default_factory=lambda: Path(__file__).resolve().parent)
     data_dir: Path = field(init=False)
     raw_dir: Path = field(init=False)
@@ -56,6 +73,13 @@ class OrchestratorConfig:
     mode_config_a: Path = field(init=False)
     mode_config_b: Path = field(init=False)
 
+    # Scratch directory for per-batch intermediates; main() sets it to a
+    # per-run directory from scratch_dir().
+    tmp_dir: Optional[Path] = None
+
+    # Filesystem-safe model names, keyed by model identifier
+    safe_models: Dict[str, str] = field(init=False)
+
     def __post_init__(self) -> None:
         self.data_dir = self.script_dir / ("data_debug" if self.debug else "data")
         self.raw_dir = self.data_dir / "raw"
@@ -67,6 +91,31 @@ class OrchestratorConfig:
         self.mode_config_a = self.script_dir / "argunauts_config_a.yaml"
         self.mode_config_b = self.script_dir / "argunauts_config_b.yaml"
 
+        self.safe_models = {model: safe_model_name(model) for model in self.models}
+
+
+@contextmanager
+def scratch_dir() -> Iterator[Path]:
+    """Yield a private scratch directory for one run and remove it afterwards.
+
+    Per-batch repair files are written and read back several times per
+    batch, so keep them in memory-backed /dev/shm (or SDKIT_TMPDIR) rather
+    than next to the aligned outputs. Each run gets its own private (0700)
+    directory, so concurrent runs (e.g. --debug next to a full run) and other
+    users never share batch files.
+    """
+    tmp_root = os.environ.get("SDKIT_TMPDIR", "/dev/shm")
+    try:
+        path = Path(tempfile.mkdtemp(prefix="argunauts_tmp_", dir=tmp_root))
+    except OSError:
+        # e.g. macOS or containers without a tmpfs mount
+        path = Path(tempfile.mkdtemp(prefix="argunauts_tmp_"))
+    try:
+        yield path
+    finally:
+        # Batch files left behind by a failed batch or an exception go with it.
+        shutil.rmtree(path, ignore_errors=True)
+
 
 def parse_orchestrator_args(argv: Optional[Sequence[str]] = None) -> OrchestratorConfig:
     """Parse CLI arguments and construct an OrchestratorConfig."""
@@ -116,7 +165,31 @@ def parse_orchestrator_args(argv: Optional[Sequence[str]] = None) -> Orchestrato
         type=int,
         default=4,
         help=(
-            "Maximum number of (mode, model) groups to process concurrently per (config, split)."
+            "Maximum number of (mode, model) groups to process concurrently, across all "
+            "(config, split) pipelines."
+        ),
+    )
+    parser.add_argument(
+        "--max-outer-workers",
+        type=int,
+        default=2,
+        help="Maximum number of (config, split) pipelines to run concurrently.",
+    )
+    parser.add_argument(
+        "--subprocess-validate",
+        action="store_true",
+        help=(
+            "Run validate_structures.py in a separate Python process per call "
+            "instead of calling it in-process."
+        ),
+    )
+
+    parser.add_argument(
+        "--subprocess-sdkit",
+        action="store_true",
+        help=(
+            "Launch the synthetic-data-kit CLI for every batch instead of "
+            "calling SD-Kit in-process from the long-lived group workers."
         ),
     )
 
@@ -131,6 +204,9 @@ def parse_orchestrator_args(argv: Optional[Sequence[str]] = None) -> Orchestrato
         max_repair_loops=args.max_repair_loops,
         debug=args.debug,
         max_group_workers=args.max_group_workers,
+        max_outer_workers=args.max_outer_workers,
+        subprocess_validate=args.subprocess_validate,
+        subprocess_sdkit=args.subprocess_sdkit,
     )
     return cfg
 
@@ -140,6 +216,37 @@ def safe_model_name(model: str) -> str:
     return model.replace("/", "-")
 
 
+@dataclass(frozen=True)
+class GroupPaths:
+    """Filesystem locations of a single (config, split, mode, model) group."""
+
+    base_name: str
+    assigned_path: Path
+    out_dir: Path
+    canonical_path: Path
+    legacy_canonical_path: Path
+
+
+def build_group_paths(
+    cfg: OrchestratorConfig,
+    config_name: str,
+    split: str,
+    mode: str,
+    model: str,
+) -> GroupPaths:
+    """Derive all per-group paths once, outside of the batch loop."""
+    safe_model = cfg.safe_models.get(model) or safe_model_name(model)
+    base_name = f"{config_name}_{split}_mode-{mode}_model-{safe_model}"
+    out_dir = cfg.aligned_dir / config_name / split / f"mode-{mode}_model-{safe_model}"
+    return GroupPaths(
+        base_name=base_name,
+        assigned_path=cfg.assigned_dir / f"{base_name}.json",
+        out_dir=out_dir,
+        canonical_path=out_dir / f"{base_name}_enhanced.jsonl",
+        legacy_canonical_path=out_dir / f"{base_name}_enhanced.json",
+    )
+
+
 def create_directories(cfg: OrchestratorConfig) -> None:
     """Create the directory structure used by the orchestrator."""
     for path in (
@@ -161,14 +268,44 @@ def run_subprocess(cmd: List[str], desc: str) -> None:
 
 
 def load_json(path: Path) -> List[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+    return read_records(path)
 
 
 def save_json(path: Path, data: Any) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as fh:
-        json.dump(data, fh, ensure_ascii=False, indent=2)
+    write_json(path, data)
+
+
+def save_jsonl_atomic(path: Path, records: Iterable[Dict[str, Any]]) -> None:
+    """Write NDJSON to a temporary sibling file and rename it over path."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    write_jsonl(tmp_path, records)
+    os.replace(tmp_path, path)
+
+
+def drop_torn_tail(path: Path, block_size: int = 1 << 16) -> None:
+    """Truncate an append-only NDJSON file after its last complete line.
+
+    Every append ends with a newline, so trailing bytes after the last one are
+    the remains of an interrupted write.
+    """
+    with path.open("rb+") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        if pos == 0:
+            return
+        fh.seek(pos - 1)
+        if fh.read(1) == b"\n":
+            return
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            fh.seek(pos)
+            idx = fh.read(step).rfind(b"\n")
+            if idx != -1:
+                pos += idx + 1
+                break
+        print(f"⚠️ [WARN] Dropping incomplete trailing record from {path}.")
+        fh.truncate(pos)
 
 
 def get_mode_config_path(cfg: OrchestratorConfig, mode: str) -> Path:
@@ -220,8 +357,13 @@ def ensure_assigned_groups(
     if not raw_path.exists():
         return
 
-    pattern = f"{config_name}_{split}_mode-*_model-*.json"
-    if list(cfg.assigned_dir.glob(pattern)):
+    # Probe the expected group files directly instead of globbing the whole
+    # assigned directory, which grows with every (config, split).
+    if any(
+        build_group_paths(cfg, config_name, split, mode, model).assigned_path.exists()
+        for mode in cfg.modes
+        for model in cfg.models
+    ):
         return
 
     cmd: List[str] = [
@@ -241,37 +383,52 @@ def ensure_assigned_groups(
     run_subprocess(cmd, desc=f"assign_modes_and_models for {config_name}/{split}")
 
 
-def compute_pending_ids(
-    original_records: List[Dict[str, Any]],
-    canonical_records: List[Dict[str, Any]],
-) -> List[Any]:
-    """Return example_ids present in original but not yet in canonical."""
-    orig_ids = [rec.get("example_id") for rec in original_records]
-    canon_ids = {rec.get("example_id") for rec in canonical_records if "example_id" in rec}
-    return [ex_id for ex_id in orig_ids if ex_id is not None and ex_id not in canon_ids]
+def compute_pending_ids(assigned_path: Path, canonical_path: Path) -> List[Any]:
+    """Return example_ids present in assigned_path but not yet in canonical_path.
+
+    Both files are streamed and only the example_ids are kept in memory.
+    For JSON arrays (the assigned files) ijson materializes just the ids; the
+    NDJSON canonical store is parsed line by line, so each canonical record
+    is decoded once and dropped right away.
+    """
+    canon_ids = set(iter_example_ids(canonical_path)) if canonical_path.exists() else set()
+    return [
+        ex_id
+        for ex_id in iter_example_ids(assigned_path)
+        if ex_id is not None and ex_id not in canon_ids
+    ]
 
 
 def build_repair_records(
-    original_records: List[Dict[str, Any]],
-    pending_ids: Iterable[Any],
+    original_by_id: Dict[Any, Dict[str, Any]],
+    batch_ids: Iterable[Any],
 ) -> List[Dict[str, Any]]:
-    pending_set = set(pending_ids)
-    return [rec for rec in original_records if rec.get("example_id") in pending_set]
+    return [original_by_id[ex_id] for ex_id in batch_ids if ex_id in original_by_id]
 
 
 def merge_clean_repair_into_canonical(
-    canonical_records: List[Dict[str, Any]],
+    canonical_by_id: Dict[Any, Dict[str, Any]],
     repair_clean_records: List[Dict[str, Any]],
-) -> List[Dict[str, Any]]:
-    by_id: Dict[Any, Dict[str, Any]] = {
-        rec["example_id"]: rec for rec in canonical_records if "example_id" in rec
+    duplicates_of: Optional[Dict[Any, List[Any]]] = None,
+) -> List[Any]:
+    """Merge cleaned repair records into canonical_by_id in place (overwriting).
+
+    Records whose example_id is a key of duplicates_of are also copied to
+    each duplicate example_id. Returns the example_ids that were merged.
+    """
+    merged = {
+        rec["example_id"]: rec
+        for rec in repair_clean_records
+        if rec.get("example_id") is not None
     }
-    for rec in repair_clean_records:
-        ex_id = rec.get("example_id")
-        if ex_id is None:
-            continue
-        by_id[ex_id] = rec
-    return list(by_id.values())
+    if duplicates_of:
+        merged.update(
+            (dup_id, dict(rec, example_id=dup_id))
+            for ex_id, rec in list(merged.items())
+            for dup_id in duplicates_of.get(ex_id, ())
+        )
+    canonical_by_id.update(merged)
+    return list(merged)
 
 
 def run_sdkit_create_cli(
@@ -300,6 +457,40 @@ def run_sdkit_create_cli(
     run_subprocess(cmd, desc=f"sdkit create {input_json.name}")
 
 
+def run_sdkit_create(
+    mode_config: Path,
+    input_json: Path,
+    model: str,
+    output_dir: Path,
+    debug: bool = False,
+    use_subprocess: bool = False,
+) -> None:
+    """Run synthetic-data-kit create for one batch.
+
+    By default SD-Kit is called in-process. Group workers are long-lived
+    processes, so SD-Kit is imported once per worker instead of once per
+    batch; use_subprocess restores the CLI call.
+
+    As with the CLI, a failed batch is reported but not raised: it leaves no
+    <input_basename>_enhanced.json, so its examples stay pending and are
+    retried in the next repair loop. Server availability is checked once per
+    group (sdkit_worker.check_server), which is the only hard failure.
+    """
+    try:
+        if use_subprocess:
+            run_sdkit_create_cli(
+                mode_config=mode_config,
+                input_json=input_json,
+                model=model,
+                output_dir=output_dir,
+                debug=debug,
+            )
+        else:
+            sdkit_worker.create(mode_config, input_json, model, output_dir, verbose=debug)
+    except Exception as exc:
+        print(f"❌ Error: SD-Kit create failed for {input_json.name}: {exc}")
+
+
 def run_validate_structures_clean_cli(
     original_path: Path,
     transformed_path: Path,
@@ -323,6 +514,35 @@ def run_validate_structures_clean_cli(
     run_subprocess(cmd, desc=f"validate_structures clean {transformed_path.name}")
 
 
+def run_validate_structures_clean(
+    original_path: Path,
+    transformed_path: Path,
+    cleaned_output_path: Path,
+    strict_ids: bool,
+    use_subprocess: bool = False,
+) -> None:
+    """Run validate_structures in clean mode.
+
+    By default the module is called in-process, which avoids paying Python
+    interpreter startup for every batch; use_subprocess restores the CLI call.
+    """
+    if use_subprocess:
+        run_validate_structures_clean_cli(
+            original_path=original_path,
+            transformed_path=transformed_path,
+            cleaned_output_path=cleaned_output_path,
+            strict_ids=strict_ids,
+        )
+        return
+
+    validate_structures.clean(
+        original_path=original_path,
+        transformed_path=transformed_path,
+        clean_output=cleaned_output_path,
+        strict_ids=strict_ids,
+    )
+
+
 def run_group_alignment_with_repairs_for_group(
     cfg: OrchestratorConfig,
     config_name: str,
@@ -337,124 +557,249 @@ def run_group_alignment_with_repairs_for_group(
     repair loop iteration to reduce per-call load on the SD-Kit CLI while
     preserving the overall retry semantics.
     """
-    safe_model = safe_model_name(model)
-    assigned_path = cfg.assigned_dir / f"{config_name}_{split}_mode-{mode}_model-{safe_model}.json"
+    group_paths = build_group_paths(cfg, config_name, split, mode, model)
+    assigned_path = group_paths.assigned_path
     if not assigned_path.exists():
         return
 
     mode_config = get_mode_config_path(cfg, mode)
-    out_dir = cfg.aligned_dir / config_name / split / f"mode-{mode}_model-{safe_model}"
-    out_dir.mkdir(parents=True, exist_ok=True)
+    out_dir = group_paths.out_dir
+    base_name = group_paths.base_name
+    # The canonical store is append-only NDJSON: each merged batch appends its
+    # records, later lines win on load, and the file is compacted to one line
+    # per example_id once the repair loop is done.
+    canonical_path = group_paths.canonical_path
+    legacy_canonical_path = group_paths.legacy_canonical_path
+    if legacy_canonical_path.exists() and not canonical_path.exists():
+        # Converted (not kept alongside) so merge_per_config never sees both.
+        save_jsonl_atomic(canonical_path, load_json(legacy_canonical_path))
+        legacy_canonical_path.unlink()
+    if canonical_path.exists():
+        drop_torn_tail(canonical_path)
+
+    # Only the example_ids of both files are kept here, so resumed runs whose
+    # canonical file already covers every assigned example return without
+    # holding any records in memory (the canonical lines are still parsed).
+    pending_ids = compute_pending_ids(assigned_path, canonical_path)
+    if not pending_ids:
+        return
 
-    base_name = f"{config_name}_{split}_mode-{mode}_model-{safe_model}"
-    canonical_path = out_dir / f"{base_name}_enhanced.json"
+    # Fail the group up front if its vLLM server is down, rather than
+    # finding out batch by batch through missing SD-Kit outputs.
+    sdkit_worker.check_server(mode_config, model)
 
-    for _ in range(cfg.max_repair_loops):
-        original_records = load_json(assigned_path)
-        canonical_records: List[Dict[str, Any]] = []
-        if canonical_path.exists():
-            canonical_records = load_json(canonical_path)
+    out_dir.mkdir(parents=True, exist_ok=True)
 
-        pending_ids = compute_pending_ids(original_records, canonical_records)
+    # assigned_path is immutable once written, so its records are loaded once
+    # per group rather than once per repair iteration.
+    original_by_id: Dict[Any, Dict[str, Any]] = {
+        rec["example_id"]: rec for rec in load_json(assigned_path) if "example_id" in rec
+    }
+    # Records without a message list get no hash and are never deduplicated.
+    hash_by_id: Dict[Any, str] = {}
+    for ex_id, rec in original_by_id.items():
+        h = dedup_subset.record_hash(rec)
+        if h is not None:
+            hash_by_id[ex_id] = h
+    # The canonical records are likewise kept in memory between batches.
+    canonical_by_id: Dict[Any, Dict[str, Any]] = {}
+    if canonical_path.exists():
+        canonical_by_id = {
+            rec["example_id"]: rec for rec in load_json(canonical_path) if "example_id" in rec
+        }
+
+    # After the first iteration the pending set is maintained incrementally:
+    # merged ids are removed from still_pending, and orig_ids_order keeps
+    # batches in assigned-file order.
+    orig_ids_order: List[Any] = [ex_id for ex_id in original_by_id if ex_id is not None]
+    still_pending: Set[Any] = set(pending_ids)
+
+    for iteration in range(cfg.max_repair_loops):
+        if iteration:
+            pending_ids = [ex_id for ex_id in orig_ids_order if ex_id in still_pending]
         if not pending_ids:
             break
 
+        # Examples with identical conversations are enhanced only once per
+        # group; the others receive a copy of their representative's output
+        # when it is merged.
+        pending_ids, duplicates_of = dedup_subset.group_duplicates(pending_ids, hash_by_id)
+        if duplicates_of:
+            n_dups = sum(len(dups) for dups in duplicates_of.values())
+            print(f"🔁 Skipping {n_dups} pending examples with duplicate conversations.")
+
         # Process the pending IDs in fixed-size batches. We compute pending_ids
         # once per outer repair iteration so that structurally invalid examples
         # are only retried in subsequent iterations, matching the original
         # semantics.
-        for start in range(0, len(pending_ids), batch_size):
-            batch_ids = pending_ids[start : start + batch_size]
-            print(
-                f"🔁 Processing batch with items {start}-{start + batch_size} of {len(pending_ids)}."
-            )
+        #
+        # Batches are pipelined two deep: while SD-Kit (I/O-bound, waiting on
+        # the LLM API) works on batch k, this thread validates and merges
+        # batch k-1. Each batch gets its own intermediate files so the two
+        # in-flight batches never share paths.
+        in_flight: Optional[Tuple[Dict[str, Path], Future]] = None
+        with ThreadPoolExecutor(max_workers=1) as sdkit_executor:
+            for start in range(0, len(pending_ids), batch_size):
+                batch_ids = pending_ids[start : start + batch_size]
+                print(
+                    f"🔁 Processing batch with items {start}-{start + batch_size} "
+                    f"of {len(pending_ids)}."
+                )
+
+                # Keep at most one SD-Kit call per group in flight.
+                if in_flight is not None:
+                    in_flight[1].result()
+
+                batch_name = f"~{base_name}_batch-{start}"
+                paths = {
+                    "input": cfg.tmp_dir / f"{batch_name}_repair_input.json",
+                    # SD-Kit follows the convention <input_basename>_enhanced.json for outputs.
+                    "raw": cfg.tmp_dir / f"{batch_name}_repair_input_enhanced.json",
+                    "clean": cfg.tmp_dir / f"{batch_name}_repair_clean.json",
+                }
+                save_json(paths["input"], build_repair_records(original_by_id, batch_ids))
+
+                # Run SD-Kit on the pending subset; it will create
+                # <batch_name>_repair_input_enhanced.json in cfg.tmp_dir.
+                future = sdkit_executor.submit(
+                    run_sdkit_create,
+                    mode_config=mode_config,
+                    input_json=paths["input"],
+                    model=model,
+                    output_dir=cfg.tmp_dir,
+                    debug=cfg.debug,
+                    use_subprocess=cfg.subprocess_sdkit,
+                )
 
-            repair_input_path = out_dir / f"~{base_name}_repair_input.json"
-            # SD-Kit follows the convention <input_basename>_enhanced.json for outputs.
-            repair_raw_path = out_dir / f"~{base_name}_repair_input_enhanced.json"
-            repair_clean_path = out_dir / f"~{base_name}_repair_clean.json"
+                if in_flight is not None:
+                    finish_repair_batch(
+                        cfg,
+                        in_flight[0],
+                        canonical_by_id,
+                        canonical_path,
+                        still_pending,
+                        duplicates_of,
+                    )
+                in_flight = (paths, future)
+
+            if in_flight is not None:
+                in_flight[1].result()
+                finish_repair_batch(
+                    cfg,
+                    in_flight[0],
+                    canonical_by_id,
+                    canonical_path,
+                    still_pending,
+                    duplicates_of,
+                )
 
-            repair_records = build_repair_records(original_records, batch_ids)
-            save_json(repair_input_path, repair_records)
+    # Compact away records superseded by retries.
+    save_jsonl_atomic(canonical_path, canonical_by_id.values())
 
-            # Run SD-Kit on the pending subset; it will create
-            # <base_name>_repair_input_enhanced.json in out_dir.
-            run_sdkit_create_cli(
-                mode_config=mode_config,
-                input_json=repair_input_path,
-                model=model,
-                output_dir=out_dir,
-                debug=cfg.debug,
-            )
 
-            if not repair_raw_path.exists():
-                print(
-                    f"⚠️ [WARN] SD-Kit did not write enhanced output "
-                    f"{repair_raw_path} for {repair_input_path}. "
-                    f"Skipping this batch in this repair loop."
-                )
-                # Nothing merged; these example_ids remain pending and may be retried
-                # in a later outer repair iteration.
-                continue
-
-            run_validate_structures_clean_cli(
-                original_path=repair_input_path,
-                transformed_path=repair_raw_path,
-                cleaned_output_path=repair_clean_path,
-                strict_ids=True,
-            )
+def finish_repair_batch(
+    cfg: OrchestratorConfig,
+    paths: Dict[str, Path],
+    canonical_by_id: Dict[Any, Dict[str, Any]],
+    canonical_path: Path,
+    still_pending: Set[Any],
+    duplicates_of: Dict[Any, List[Any]],
+) -> None:
+    """Validate one SD-Kit batch output and merge it into the canonical records.
 
-            repair_clean_records = load_json(repair_clean_path)
-            canonical_records = merge_clean_repair_into_canonical(
-                canonical_records,
-                repair_clean_records,
+    Merged records are appended to the canonical store, and their example_ids
+    (including fanned-out duplicates) are removed from still_pending.
+    """
+    try:
+        if not paths["raw"].exists():
+            print(
+                f"⚠️ [WARN] SD-Kit did not write enhanced output "
+                f"{paths['raw']} for {paths['input']}. "
+                f"Skipping this batch in this repair loop."
             )
-            save_json(canonical_path, canonical_records)
+            # Nothing merged; these example_ids remain pending and may be retried
+            # in a later outer repair iteration.
+            return
+
+        run_validate_structures_clean(
+            original_path=paths["input"],
+            transformed_path=paths["raw"],
+            cleaned_output_path=paths["clean"],
+            strict_ids=True,
+            use_subprocess=cfg.subprocess_validate,
+        )
+
+        repair_clean_records = load_json(paths["clean"])
+        merged_ids = merge_clean_repair_into_canonical(
+            canonical_by_id, repair_clean_records, duplicates_of
+        )
+        append_jsonl(canonical_path, (canonical_by_id[ex_id] for ex_id in merged_ids))
+        still_pending.difference_update(merged_ids)
+    finally:
+        # Best-effort cleanup of per-batch intermediates
+        for tmp_path in paths.values():
+            try:
+                tmp_path.unlink()
+            except FileNotFoundError:
+                pass
 
-            # Best-effort cleanup of per-batch intermediates
-            for tmp_path in (repair_input_path, repair_raw_path, repair_clean_path):
-                try:
-                    tmp_path.unlink()
-                except FileNotFoundError:
-                    pass
+
+@contextmanager
+def group_worker_pool(cfg: OrchestratorConfig) -> Iterator[ProcessPoolExecutor]:
+    """Yield the process pool that runs (mode, model) groups.
+
+    Groups do real CPU work (JSON parsing, validation, merging), so they run
+    in separate processes rather than threads to avoid contending for the
+    GIL. The workers are shared by all (config, split) pipelines.
+
+    Workers are spawned rather than forked: the pool is used from the
+    (config, split) threads, and forking a process that runs threads is
+    unsafe (and whether ProcessPoolExecutor forks all workers up front
+    differs between Python patch releases). Spawned workers import the
+    orchestrator once and then serve every group they are given.
+    """
+    total_groups = len(cfg.modes) * len(cfg.models) * max(1, cfg.max_outer_workers)
+    max_workers = max(1, min(total_groups, cfg.max_group_workers))
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        yield executor
 
 
 def run_group_alignment_with_repairs(
     cfg: OrchestratorConfig,
     config_name: str,
     split: str,
+    executor: ProcessPoolExecutor,
 ) -> None:
     """Run per-sample repair alignment for all (mode, model) groups in a split.
 
-    Groups (config, split, mode, model) are processed concurrently using a
-    thread pool, up to cfg.max_group_workers.
+    Groups (config, split, mode, model) are processed concurrently on the
+    given process pool (see group_worker_pool).
     """
     tasks = []
 
-    total_groups = len(cfg.modes) * len(cfg.models)
-    max_workers = min(total_groups, max(1, cfg.max_group_workers))
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for mode in cfg.modes:
-            for model in cfg.models:
-                future = executor.submit(
-                    run_group_alignment_with_repairs_for_group,
-                    cfg,
-                    config_name,
-                    split,
-                    mode,
-                    model,
-                )
-                tasks.append(((mode, model), future))
+    for mode in cfg.modes:
+        for model in cfg.models:
+            future = executor.submit(
+                run_group_alignment_with_repairs_for_group,
+                cfg,
+                config_name,
+                split,
+                mode,
+                model,
+            )
+            tasks.append(((mode, model), future))
 
-        for (mode, model), future in tasks:
-            try:
-                future.result()
-            except Exception as exc:  # pragma: no cover - passthrough
-                raise RuntimeError(
-                    "Group alignment failed for "
-                    f"config={config_name}, split={split}, mode={mode}, model={model}"
-                ) from exc
+    for (mode, model), future in tasks:
+        try:
+            future.result()
+        except Exception as exc:  # pragma: no cover - passthrough
+            raise RuntimeError(
+                "Group alignment failed for "
+                f"config={config_name}, split={split}, mode={mode}, model={model}"
+            ) from exc
 
 
 def run_merge_for_config_split(
@@ -492,28 +837,38 @@ def run_global_validation_and_clean(
     if not raw_path.exists() or not merged_path.exists():
         return
 
-    run_validate_structures_clean_cli(
+    run_validate_structures_clean(
         original_path=raw_path,
         transformed_path=merged_path,
         cleaned_output_path=cleaned_output_path,
         strict_ids=True,
+        use_subprocess=cfg.subprocess_validate,
     )
 
 
-def run_config_split_pipeline(cfg: OrchestratorConfig, config_name: str, split: str) -> None:
+def run_config_split_pipeline(
+    cfg: OrchestratorConfig,
+    config_name: str,
+    split: str,
+    executor: ProcessPoolExecutor,
+) -> None:
     """Run the full pipeline for a single (config, split)."""
     raw_path = cfg.raw_dir / f"{config_name}_{split}_raw.json"
 
     ensure_raw_subset(cfg, config_name, split, raw_path)
     ensure_assigned_groups(cfg, config_name, split)
 
-    run_group_alignment_with_repairs(cfg, config_name, split)
+    run_group_alignment_with_repairs(cfg, config_name, split, executor)
 
     merged_path = cfg.merged_dir / f"{config_name}-aligned_{split}.json"
     run_merge_for_config_split(cfg, config_name, split, merged_path)
 
+    # Validation is CPU-bound, so it runs on the process pool rather than on
+    # this (config, split) thread.
     cleaned_path = cfg.cleaned_dir / f"{config_name}-aligned_{split}.json"
-    run_global_validation_and_clean(cfg, raw_path, merged_path, cleaned_path)
+    executor.submit(
+        run_global_validation_and_clean, cfg, raw_path, merged_path, cleaned_path
+    ).result()
 
 
 def load_local_env(script_dir: Path) -> None:
@@ -540,9 +895,27 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
     load_local_env(cfg.script_dir)
     create_directories(cfg)
 
-    for config_name in cfg.configs:
-        for split in cfg.splits:
-            run_config_split_pipeline(cfg, config_name, split)
+    # (config, split) pipelines share nothing but the group process pool.
+    # Their own work is mostly waiting on subprocesses and pool futures, so
+    # plain threads are enough to overlap them.
+    tasks = [(config_name, split) for config_name in cfg.configs for split in cfg.splits]
+    max_outer_workers = max(1, min(len(tasks), cfg.max_outer_workers))
+    with scratch_dir() as tmp_dir:
+        cfg.tmp_dir = tmp_dir
+        with group_worker_pool(cfg) as executor, ThreadPoolExecutor(
+            max_workers=max_outer_workers
+        ) as outer:
+            futures = [
+                outer.submit(run_config_split_pipeline, cfg, config_name, split, executor)
+                for config_name, split in tasks
+            ]
+            for (config_name, split), future in zip(tasks, futures):
+                try:
+                    future.result()
+                except Exception as exc:  # pragma: no cover - passthrough
+                    raise RuntimeError(
+                        f"Pipeline failed for config={config_name}, split={split}"
+                    ) from exc
 
 
 if __name__ == "__main__":  # pragma: no cover
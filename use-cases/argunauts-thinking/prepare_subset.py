@@ -1,8 +1,12 @@
 import argparse
+import itertools
 from pathlib import Path
 
+import numpy as np
 from datasets import load_dataset
 
+from json_io import write_json_array, write_jsonl
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -60,7 +64,8 @@ def parse_args() -> argparse.Namespace:
         type=str,
         default=None,
         help=(
-            "Output JSON path. If omitted, a default name of the form "
+            "Output path; a .jsonl path is written as newline-delimited JSON, "
+            "anything else as a JSON array. If omitted, a default name of the form "
             "argunauts_<split>_conversations.json will be used in this directory."
         ),
     )
@@ -78,30 +83,36 @@ def main() -> None:
     else:
         output_path = script_dir / f"argunauts_{args.split}_conversations.json"
 
-    # Build split expression if n is provided
-    split_expr = args.split
-    if args.n is not None:
-        if args.n <= 0:
-            raise ValueError("--n must be positive if provided")
-        split_expr = f"{args.split}[:{args.n}]"
+    if args.n is not None and args.n <= 0:
+        raise ValueError("--n must be positive if provided")
 
-    load_kwargs = {"split": split_expr}
+    load_kwargs = {"split": args.split, "streaming": True}
     if args.config_name is not None:
         load_kwargs["name"] = args.config_name
 
-    print(f"Loading dataset {args.dataset!r}, config {args.config_name!r}, split {split_expr!r}...")
+    # Stream the split and stop after the first n examples instead of letting
+    # `split[:n]` download and materialize whole shards.
+    print(
+        f"Streaming dataset {args.dataset!r}, config {args.config_name!r}, "
+        f"split {args.split!r}..."
+    )
     ds = load_dataset(args.dataset, **load_kwargs)
-    ds = ds.shuffle(seed=args.seed)
+    rows = list(itertools.islice(ds, args.n))
 
     messages_field = args.messages_field
-    if messages_field not in ds.column_names:
+    if rows and messages_field not in rows[0]:
         raise ValueError(
-            f"Field {messages_field!r} not found in dataset columns {ds.column_names}. "
+            f"Field {messages_field!r} not found in dataset columns {list(rows[0])}. "
             "Use --messages-field to point to the list of messages."
         )
 
+    # Same permutation as Dataset.shuffle(seed=...) on the first n rows, so
+    # subsets stay identical to those produced by the non-streaming loader.
+    permutation = np.random.default_rng(args.seed).permutation(len(rows))
+
     records = []
-    for idx, ex in enumerate(ds):
+    for idx, row_idx in enumerate(permutation):
+        ex = rows[row_idx]
         messages = ex[messages_field]
         # We also keep a simple example_id to help with potential downstream matching
         records.append(
@@ -113,10 +124,13 @@ def main() -> None:
 
     print(f"Writing {len(records)} examples to {output_path}...")
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    import json
-
-    with output_path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+    # .jsonl outputs get one compact record per line (NDJSON). Anything else
+    # (e.g. the *_raw.json subsets) stays a JSON array so that json.load, jq
+    # and SD-Kit can read it; the array is still streamed record by record.
+    if output_path.suffix == ".jsonl":
+        write_jsonl(output_path, records)
+    else:
+        write_json_array(output_path, records, indent=False)
 
     print("Done.")
 
@@ -1,10 +1,12 @@
 import argparse
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List
 
 from datasets import Dataset, DatasetDict
 
+from json_io import read_records
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -76,61 +78,98 @@ def parse_args() -> argparse.Namespace:
             "created as private when first pushed."
         ),
     )
+    parser.add_argument(
+        "--max-push-workers",
+        type=int,
+        default=1,
+        help=(
+            "Maximum number of configs to push to the Hub concurrently "
+            "(default: 1). Every push rewrites the shared dataset card "
+            "(README.md configs/dataset_info), so concurrent pushes to the "
+            "same repo can drop configs from the card or fail on commit "
+            "conflicts."
+        ),
+    )
     parser.set_defaults(private=True)
     return parser.parse_args()
 
 
 def load_split(path: Path) -> List[Dict]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_records(path)
     if not isinstance(data, list):
         raise ValueError(f"Merged file must contain a list of records: {path}")
     return data
 
 
+def load_config_splits(
+    config: str,
+    splits: List[str],
+    cleaned_dir: Path,
+    merged_dir: Path,
+    messages_field: str,
+) -> DatasetDict:
+    """Load the available splits of one config, preferring cleaned files."""
+    dd = DatasetDict()
+    for split in splits:
+        filename = f"{config}-aligned_{split}.json"
+
+        cleaned_path = cleaned_dir / filename
+        merged_path = merged_dir / filename
+
+        if cleaned_path.exists():
+            path = cleaned_path
+        elif merged_path.exists():
+            path = merged_path
+        else:
+            # It is valid for some splits to be missing
+            continue
+
+        # The split files are JSON arrays, which Dataset.from_json cannot
+        # stream: it would load them in Python anyway and also write an
+        # Arrow cache to disk. Parsing them directly is cheaper.
+        records = load_split(path)
+        # Normalize the messages column name for the uploaded dataset.
+        # Internal files use 'conversations' for the list of messages.
+        if messages_field != "conversations":
+            for rec in records:
+                if messages_field not in rec and "conversations" in rec:
+                    rec[messages_field] = rec.pop("conversations")
+        dd[split] = Dataset.from_list(records)
+    return dd
+
+
+def push_config(dd: DatasetDict, repo_id: str, config: str, private: bool) -> None:
+    config_name = f"{config}-aligned"
+    print(
+        f"Pushing config {config_name!r} to {repo_id} with splits: {list(dd.keys())} "
+        f"(private={private})"
+    )
+    dd.push_to_hub(repo_id, config_name=config_name, private=private)
+
+
 def main() -> None:
     args = parse_args()
 
     merged_dir = Path(args.merged_dir)
     cleaned_dir = Path(args.cleaned_dir)
     repo_id = f"{args.org}/{args.repo_name}"
-    messages_field = args.messages_field
-
-    for config in args.configs:
-        dd = DatasetDict()
-        for split in args.splits:
-            filename = f"{config}-aligned_{split}.json"
-
-            cleaned_path = cleaned_dir / filename
-            merged_path = merged_dir / filename
-
-            if cleaned_path.exists():
-                path = cleaned_path
-            elif merged_path.exists():
-                path = merged_path
-            else:
-                # It is valid for some splits to be missing
-                continue
 
-            records = load_split(path)
-            # Normalize the messages column name for the uploaded dataset.
-            # Internal files use 'conversations' for the list of messages.
-            if messages_field != "conversations":
-                for rec in records:
-                    if messages_field not in rec and "conversations" in rec:
-                        rec[messages_field] = rec.pop("conversations")
-            dd[split] = Dataset.from_list(records)
-
-        if not dd:
-            print(f"No splits found for config={config}, skipping push.")
-            continue
+    # Pushes run in a background thread so that loading the next config
+    # overlaps with the current upload. By default only one push runs at a
+    # time, which serializes the dataset card commits.
+    with ThreadPoolExecutor(max_workers=max(1, args.max_push_workers)) as executor:
+        futures = []
+        for config in args.configs:
+            dd = load_config_splits(
+                config, args.splits, cleaned_dir, merged_dir, args.messages_field
+            )
+            if not dd:
+                print(f"No splits found for config={config}, skipping push.")
+                continue
+            futures.append(executor.submit(push_config, dd, repo_id, config, args.private))
 
-        config_name = f"{config}-aligned"
-        print(
-            f"Pushing config {config_name!r} to {repo_id} with splits: {list(dd.keys())} "
-            f"(private={args.private})"
-        )
-        dd.push_to_hub(repo_id, config_name=config_name, private=args.private)
+        for future in futures:
+            future.result()
 
 
 if __name__ == "__main__":
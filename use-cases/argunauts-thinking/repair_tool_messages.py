@@ -1,45 +1,102 @@
 #!/usr/bin/env python3
+import itertools
 import json
+import multiprocessing
+import multiprocessing.pool
+import os
+import re
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from json_io import iter_example_ids, iter_records, loads, write_json_array
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover - optional dependency
+    simdjson = None
+
+# pysimdjson validates a document without materializing Python objects for
+# it, which is all try_parse_json needs. A parser keeps its buffers between
+# calls but must not be shared by concurrent threads, so each thread reuses
+# its own.
+_simdjson_local = threading.local()
+
+
+def _simdjson_parser() -> Any:
+    parser = getattr(_simdjson_local, "parser", None)
+    if parser is None:
+        parser = _simdjson_local.parser = simdjson.Parser()
+    return parser
 
 
 RAW_DIR = Path("data/raw")
 CLEANED_DIR = Path("data/cleaned")
 REPAIRED_DIR = Path("data/repaired")
 
+# Records are sent to pool workers in chunks of RECORD_CHUNKSIZE, and at most
+# RECORD_WINDOW records per worker are read ahead of the repaired output.
+RECORD_CHUNKSIZE = 64
+RECORD_WINDOW = 4 * RECORD_CHUNKSIZE
+
+# Example: deepa2-aaac01-thinking_train_raw.json -> (deepa2-aaac01-thinking, train)
+RAW_NAME_PATTERN = re.compile(r"^(deepa2-.+-thinking)_([^_]+)_raw\.json$")
 
-def load_json(path: Path) -> List[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
-        raise ValueError(f"Expected list at top level: {path}")
-    return data
+# A JSON document, once its insignificant whitespace is stripped, must start
+# and end with one of these characters (objects, arrays, strings, numbers,
+# true/false/null, and the NaN/Infinity/-Infinity constants the stdlib json
+# module also accepts). Anything else is rejected without running the parser.
+_JSON_WHITESPACE = " \t\n\r"
+_JSON_FIRST_CHARS = frozenset('{["-0123456789tfnNI')
+_JSON_LAST_CHARS = frozenset('}]"0123456789elNy')
 
 
-def index_by_example_id(records: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+def index_by_example_id(
+    records: Iterable[Dict[str, Any]],
+    keep: Optional[Set[Any]] = None,
+) -> Dict[Any, Dict[str, Any]]:
+    """Index records by example_id, validating ids across all records.
+
+    If keep is given, only records whose example_id is in keep are retained,
+    so a streamed input never has to be held in memory as a whole.
+    """
     index: Dict[Any, Dict[str, Any]] = {}
+    seen: Set[Any] = set()
     for rec in records:
         eid = rec.get("example_id")
         if eid is None:
             raise ValueError(f"Record missing 'example_id': {rec}")
-        if eid in index:
+        if eid in seen:
             raise ValueError(f"Duplicate example_id {eid}")
-        index[eid] = rec
+        seen.add(eid)
+        if keep is None or eid in keep:
+            index[eid] = rec
     return index
 
 
-def get_messages(rec: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Return the list of messages for a record.
+def resolve_msg_key(rec: Dict[str, Any]) -> Optional[str]:
+    """Return the key holding a record's messages, or None if it has none.
 
     Internal files use the key 'conversations'. If a record uses 'messages'
     instead, we fall back to that.
     """
     if "conversations" in rec:
-        return rec["conversations"]
+        return "conversations"
     if "messages" in rec:
-        return rec["messages"]
-    return []
+        return "messages"
+    return None
+
+
+def get_messages(rec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the list of messages for a record (see resolve_msg_key)."""
+    key = resolve_msg_key(rec)
+    return rec[key] if key is not None else []
+
+
+def tool_indices(conv: List[Dict[str, Any]]) -> List[int]:
+    """Return the positions of the tool messages in a conversation."""
+    return [i for i, m in enumerate(conv) if m.get("role") == "tool"]
 
 
 def try_parse_json(s: Any) -> bool:
@@ -51,6 +108,31 @@ def try_parse_json(s: Any) -> bool:
     """
     if not isinstance(s, str):
         return True
+    t = s.strip(_JSON_WHITESPACE)
+    if not t or t[0] not in _JSON_FIRST_CHARS or t[-1] not in _JSON_LAST_CHARS:
+        return False
+    return _parses_as_json(s)
+
+
+@lru_cache(maxsize=8192)
+def _parses_as_json(s: str) -> bool:
+    # Tool contents repeat a lot across records (same tool schemas), so
+    # validity is memoized per string.
+    try:
+        if simdjson is not None:
+            # The str is passed as-is; the parser encodes it into its own
+            # padded buffer, so no intermediate bytes copy is made. The lazy
+            # document proxy is dropped right away, which frees the parser
+            # for the next call.
+            _simdjson_parser().parse(s)
+        else:
+            loads(s)
+        return True
+    except Exception:
+        pass
+    # The fast parsers reject some documents the stdlib accepts (integers
+    # wider than 64 bits, NaN/Infinity, out-of-range floats), so the stdlib
+    # parser has the final say, as it had before the fast paths were added.
     try:
         json.loads(s)
         return True
@@ -68,65 +150,187 @@ def repair_record(
     message. If both sides are non-JSON, the example is marked as
     unrepairable and the caller should skip it.
     """
-    # Deep copy cleaned_rec so we don't mutate the input
-    repaired: Dict[str, Any] = json.loads(json.dumps(cleaned_rec))
-
+    # The key is resolved once and reused when the copy is written back.
+    msg_key = resolve_msg_key(cleaned_rec)
     conv_raw = get_messages(raw_rec)
-    conv_rep = get_messages(repaired)
+    conv_rep: List[Dict[str, Any]] = cleaned_rec[msg_key] if msg_key is not None else []
 
     if len(conv_raw) != len(conv_rep):
         # This should not happen for cleaned files; treat as unrepairable.
-        return repaired, False
-
-    for mr, mc in zip(conv_raw, conv_rep):
-        if mr.get("role") == "tool" and mc.get("role") == "tool":
-            raw_content = mr.get("content")
-            cleaned_content = mc.get("content")
+        return cleaned_rec, False
+
+    # cleaned_rec is never mutated, and is returned as-is unless a tool
+    # message actually needs repair. Only then are the record and its message
+    # list shallow-copied and the repaired message cloned; every other
+    # message object stays shared with cleaned_rec.
+    repaired = cleaned_rec
+
+    # Every tool message in repaired ends up either with JSON-parseable
+    # content or the record is rejected, so no separate sanity pass over the
+    # result is needed.
+    for i in tool_indices(conv_rep):
+        mr, mc = conv_raw[i], conv_rep[i]
+
+        # Cleaned tool content is fine: nothing to do.
+        if try_parse_json(mc.get("content")):
+            continue
 
-            raw_ok = try_parse_json(raw_content)
-            cleaned_ok = try_parse_json(cleaned_content)
+        # Raw is OK, cleaned is not: repair by copying raw fields (and align
+        # the tool name as well, just in case).
+        if mr.get("role") == "tool" and try_parse_json(mr.get("content")):
+            if repaired is cleaned_rec:
+                repaired = dict(cleaned_rec)
+                conv_rep = repaired[msg_key] = list(conv_rep)
+            conv_rep[i] = {**mc, "content": mr.get("content"), "name": mr.get("name")}
+            continue
 
-            # Cleaned tool content is fine: nothing to do.
-            if cleaned_ok:
-                continue
+        # Neither the cleaned nor a matching raw tool content is JSON.
+        return repaired, False
 
-            # Raw is OK, cleaned is not: repair by copying raw fields.
-            if raw_ok:
-                mc["content"] = raw_content
-                # Align tool name as well, just in case.
-                mc["name"] = mr.get("name")
-                continue
+    return repaired, True
 
-            # Both raw and cleaned tool contents are non-JSON.
-            return repaired, False
 
-    # Final sanity check: ensure all tool messages in repaired are JSON-parseable.
-    for m in conv_rep:
-        if m.get("role") == "tool" and not try_parse_json(m.get("content")):
-            return repaired, False
+def repair_one(item: Tuple[Optional[Dict[str, Any]], Dict[str, Any]]) -> Tuple[str, Any]:
+    """Repair one cleaned record against its raw record (None if there is none).
 
-    return repaired, True
+    Returns ("ok", record) for records to keep, and ("no_raw", example_id) or
+    ("unrepairable", example_id) for skipped ones.
+    """
+    raw_rec, cleaned_rec = item
+    eid = cleaned_rec.get("example_id")
+    if eid is None:
+        # Should not happen, but skip defensively.
+        return "unrepairable", eid
+
+    # If we don't have a raw reference, keep the example only if all tool
+    # messages in the cleaned record are JSON-parseable.
+    if raw_rec is None:
+        conv = get_messages(cleaned_rec)
+        if all(try_parse_json(conv[i].get("content")) for i in tool_indices(conv)):
+            return "ok", cleaned_rec
+        return "no_raw", eid
+
+    repaired, ok = repair_record(raw_rec, cleaned_rec)
+    if ok:
+        return "ok", repaired
+    return "unrepairable", eid
 
 
 def find_file_pairs() -> List[Tuple[Path, Path, str, str]]:
     """Return list of (raw_path, cleaned_path, config, split)."""
     pairs: List[Tuple[Path, Path, str, str]] = []
-    for raw_path in sorted(RAW_DIR.glob("deepa2-*-thinking_*_raw.json")):
-        name = raw_path.name
-        # Example: deepa2-aaac01-thinking_train_raw.json
-        base = name[: -len("_raw.json")]  # deepa2-aaac01-thinking_train
-        if "_" not in base:
+    # List the cleaned directory once instead of stat-ing every candidate.
+    cleaned_names = set(os.listdir(CLEANED_DIR)) if CLEANED_DIR.is_dir() else set()
+    raw_names = sorted(os.listdir(RAW_DIR)) if RAW_DIR.is_dir() else []
+    for name in raw_names:
+        m = RAW_NAME_PATTERN.match(name)
+        if m is None:
             continue
-        config, split = base.rsplit("_", 1)
+        config, split = m.group(1), m.group(2)
+        raw_path = RAW_DIR / name
         cleaned_name = f"{config}-aligned_{split}.json"
         cleaned_path = CLEANED_DIR / cleaned_name
-        if cleaned_path.exists():
+        if cleaned_name in cleaned_names:
             pairs.append((raw_path, cleaned_path, config, split))
         else:
             print(f"[WARN] No cleaned file for {raw_path} (expected {cleaned_path})")
     return pairs
 
 
+def imap_bounded(
+    pool: multiprocessing.pool.Pool,
+    func: Any,
+    items: Iterable[Any],
+    window: int,
+    chunksize: int,
+) -> Iterator[Any]:
+    """Like pool.imap(func, items, chunksize), but with bounded read-ahead.
+
+    Pool.imap's feeder thread consumes its whole input up front, so items are
+    handed to the pool in windows of at most window items. The next window
+    is submitted before the current one is drained, which keeps the workers
+    busy while holding at most two windows in memory.
+    """
+    it = iter(items)
+    pending: Optional[Iterator[Any]] = None
+    while True:
+        batch = list(itertools.islice(it, window))
+        submitted = pool.imap(func, batch, chunksize) if batch else None
+        if pending is not None:
+            yield from pending
+        if submitted is None:
+            return
+        pending = submitted
+
+
+def process_pair(
+    pair: Tuple[Path, Path, str, str],
+    pool: Optional[multiprocessing.pool.Pool] = None,
+) -> str:
+    """Repair one (raw, cleaned) file pair and return its report text.
+
+    If pool is given, records are repaired on it; otherwise in-process.
+    """
+    raw_path, cleaned_path, config, split = pair
+    lines: List[str] = []
+    out = lines.append
+
+    out(f"\n=== Repairing config: {config} | Split: {split} ===")
+    out(f"Raw:     {raw_path}")
+    out(f"Cleaned: {cleaned_path}")
+
+    # Records are streamed: only the raw records that a cleaned record
+    # refers to are kept, and repaired records are written out as they are
+    # produced.
+    cleaned_ids = set(iter_example_ids(cleaned_path))
+    raw_index = index_by_example_id(iter_records(raw_path), keep=cleaned_ids)
+
+    counts = {"cleaned": 0, "repaired": 0}
+    skipped_no_raw: List[Any] = []
+    skipped_unrepairable: List[Any] = []
+
+    items = (
+        (raw_index.get(cleaned_rec.get("example_id")), cleaned_rec)
+        for cleaned_rec in iter_records(cleaned_path)
+    )
+    # imap (not imap_unordered) keeps the output in cleaned-file order, and
+    # the bounded windows keep the streaming memory profile with a pool.
+    if pool is not None:
+        window = RECORD_WINDOW * (os.cpu_count() or 1)
+        results = imap_bounded(pool, repair_one, items, window, RECORD_CHUNKSIZE)
+    else:
+        results = map(repair_one, items)
+
+    def repaired_records() -> Iterator[Dict[str, Any]]:
+        for status, value in results:
+            counts["cleaned"] += 1
+            if status == "ok":
+                counts["repaired"] += 1
+                yield value
+            elif status == "no_raw":
+                skipped_no_raw.append(value)
+            else:
+                skipped_unrepairable.append(value)
+
+    out_path = REPAIRED_DIR / cleaned_path.name
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    write_json_array(out_path, repaired_records())
+
+    # Quick sanity count and report
+    out(f"Total cleaned examples:     {counts['cleaned']}")
+    out(f"Total repaired examples:    {counts['repaired']}")
+    out(f"Skipped (no raw reference): {len(skipped_no_raw)}")
+    out(f"Skipped (unrepairable):     {len(skipped_unrepairable)}")
+    if skipped_no_raw:
+        more = " ..." if len(skipped_no_raw) > 5 else ""
+        out(f"  example_ids (no raw):       {skipped_no_raw[:5]}{more}")
+    if skipped_unrepairable:
+        more = " ..." if len(skipped_unrepairable) > 5 else ""
+        out(f"  example_ids (unrepairable): {skipped_unrepairable[:5]}{more}")
+
+    return "\n".join(lines)
+
+
 def main() -> None:
     REPAIRED_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -135,68 +339,22 @@ def main() -> None:
         print("No raw/cleaned file pairs found.")
         return
 
-    for raw_path, cleaned_path, config, split in pairs:
-        print(f"\n=== Repairing config: {config} | Split: {split} ===")
-        print(f"Raw:     {raw_path}")
-        print(f"Cleaned: {cleaned_path}")
-
-        raw_records = load_json(raw_path)
-        cleaned_records = load_json(cleaned_path)
-
-        raw_index = index_by_example_id(raw_records)
-
-        repaired_records: List[Dict[str, Any]] = []
-        skipped_no_raw: List[Any] = []
-        skipped_unrepairable: List[Any] = []
-
-        for cleaned_rec in cleaned_records:
-            eid = cleaned_rec.get("example_id")
-            if eid is None:
-                # Should not happen, but skip defensively.
-                skipped_unrepairable.append(eid)
-                continue
-
-            raw_rec = raw_index.get(eid)
-
-            # If we don't have a raw reference, keep the example only if all
-            # tool messages in the cleaned record are JSON-parseable.
-            if raw_rec is None:
-                conv = get_messages(cleaned_rec)
-                all_ok = True
-                for m in conv:
-                    if m.get("role") == "tool" and not try_parse_json(m.get("content")):
-                        all_ok = False
-                        break
-                if all_ok:
-                    repaired_records.append(cleaned_rec)
-                else:
-                    skipped_no_raw.append(eid)
-                continue
-
-            repaired, ok = repair_record(raw_rec, cleaned_rec)
-            if ok:
-                repaired_records.append(repaired)
-            else:
-                skipped_unrepairable.append(eid)
-
-        out_path = REPAIRED_DIR / cleaned_path.name
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        with out_path.open("w", encoding="utf-8") as f:
-            json.dump(repaired_records, f, ensure_ascii=False, indent=2)
-
-        # Quick sanity count and report
-        print(f"Total cleaned examples:     {len(cleaned_records)}")
-        print(f"Total repaired examples:    {len(repaired_records)}")
-        print(f"Skipped (no raw reference): {len(skipped_no_raw)}")
-        print(f"Skipped (unrepairable):     {len(skipped_unrepairable)}")
-        if skipped_no_raw:
-            print(
-                f"  example_ids (no raw):       {skipped_no_raw[:5]}{' ...' if len(skipped_no_raw) > 5 else ''}"
-            )
-        if skipped_unrepairable:
-            print(
-                f"  example_ids (unrepairable): {skipped_unrepairable[:5]}{' ...' if len(skipped_unrepairable) > 5 else ''}"
-            )
+    # File pairs are independent, so repair them in worker processes. imap
+    # keeps the reports in discovery order. We use "spawn" so workers do not
+    # inherit the parent's memory via fork.
+    ctx = multiprocessing.get_context("spawn")
+    if len(pairs) == 1:
+        # A single pair gains nothing from pair-level workers, so spread its
+        # records over the pool instead (pool workers cannot have children,
+        # so the two levels are not combined).
+        with ctx.Pool(os.cpu_count() or 1) as pool:
+            print(process_pair(pairs[0], pool))
+        return
+
+    processes = min(len(pairs), os.cpu_count() or 1)
+    with ctx.Pool(processes) as pool:
+        for report in pool.imap(process_pair, pairs):
+            print(report)
 
 
 if __name__ == "__main__":
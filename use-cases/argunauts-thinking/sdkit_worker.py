@@ -0,0 +1,76 @@
+"""In-process SD-Kit entry point for the orchestrator's group workers.
+
+Launching the synthetic-data-kit CLI for every batch re-imports the whole
+toolchain each time. orchestrate_argunauts.py instead runs its groups in
+long-lived worker processes that import SD-Kit on their first batch and then
+call its Python API directly for every following batch.
+"""
+
+from pathlib import Path
+
+
+def check_server(mode_config: Path, model: str) -> None:
+    """Raise RuntimeError if the vLLM server configured in mode_config is down.
+
+    This is the availability check the CLI runs before every create call;
+    api-endpoint providers are not checked, as in the CLI.
+    """
+    import requests
+    from synthetic_data_kit.utils.config import get_llm_provider, get_vllm_config, load_config
+
+    config = load_config(str(mode_config))
+    if get_llm_provider(config) == "api-endpoint":
+        return
+
+    api_base = get_vllm_config(config).get("api_base")
+    try:
+        response = requests.get(f"{api_base}/models", timeout=2)
+        available = response.status_code == 200
+    except requests.exceptions.RequestException:
+        available = False
+    if not available:
+        raise RuntimeError(
+            f"VLLM server not available at {api_base} (start it with: vllm serve {model})"
+        )
+
+
+def create(
+    mode_config: Path,
+    input_json: Path,
+    model: str,
+    output_dir: Path,
+    verbose: bool = False,
+) -> str:
+    """Equivalent of `synthetic-data-kit -c <mode_config> create <input_json> --type cot-enhance`.
+
+    Returns the path of the written <input_basename>_enhanced.json.
+    Exceptions are raised; the orchestrator's run_sdkit_create logs them and
+    leaves the batch pending, as the CLI did. Use check_server first; this
+    function does not check the server.
+    """
+    from synthetic_data_kit.core.create import process_file
+    from synthetic_data_kit.utils.config import (
+        get_llm_provider,
+        get_openai_config,
+        get_vllm_config,
+        load_config,
+    )
+
+    config = load_config(str(mode_config))
+    provider = get_llm_provider(config)
+    if provider == "api-endpoint":
+        api_base = get_openai_config(config).get("api_base")
+    else:
+        api_base = get_vllm_config(config).get("api_base")
+
+    return process_file(
+        str(input_json),
+        str(output_dir),
+        mode_config,
+        api_base,
+        model,
+        "cot-enhance",
+        None,
+        verbose,
+        provider=provider,
+    )
@@ -1,7 +1,9 @@
 import argparse
-import json
+import hashlib
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from json_io import read_records, write_json_array
 
 
 def parse_args() -> argparse.Namespace:
@@ -45,28 +47,66 @@ def parse_args() -> argparse.Namespace:
             "If omitted, a *_cleaned.json file is written next to --transformed."
         ),
     )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help=(
+            "Skip the per-message comparison when both files have the same "
+            "example_ids and the same role sequence for every example. Message "
+            "keys and metadata fields are then not checked."
+        ),
+    )
     return parser.parse_args()
 
 
 def load_as_dict(path: Path) -> Dict[Any, Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_records(path)
 
     if not isinstance(data, list):
         raise ValueError(f"Top-level JSON must be a list in {path}")
 
-    records: Dict[Any, Dict[str, Any]] = {}
-    for idx, item in enumerate(data):
-        if not isinstance(item, dict):
-            raise ValueError(f"Record {idx} in {path} is not an object")
-        example_id = item.get("example_id", idx)
-        if example_id in records:
-            raise ValueError(f"Duplicate example_id {example_id!r} in {path}")
-        records[example_id] = item
+    # Build the index in one comprehension; invalid input (non-object records
+    # or duplicate ids) shows up as a length mismatch and is only then
+    # located by the slower per-record loop below.
+    records: Dict[Any, Dict[str, Any]]
+    try:
+        records = {item.get("example_id", idx): item for idx, item in enumerate(data)}
+    except AttributeError:
+        records = {}
+
+    if len(records) != len(data):
+        seen: Set[Any] = set()
+        for idx, item in enumerate(data):
+            if not isinstance(item, dict):
+                raise ValueError(f"Record {idx} in {path} is not an object")
+            example_id = item.get("example_id", idx)
+            if example_id in seen:
+                raise ValueError(f"Duplicate example_id {example_id!r} in {path}")
+            seen.add(example_id)
 
     return records
 
 
+def structural_fingerprint(records: Dict[Any, Dict[str, Any]]) -> Optional[str]:
+    """Return a hash of the example_ids and per-example message roles.
+
+    Returns None if some conversation is not a list of objects, since such
+    records always need the full comparison to be reported.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for example_id in sorted(records):
+        conv = records[example_id].get("conversations")
+        if not isinstance(conv, list):
+            return None
+        roles = []
+        for m in conv:
+            if not isinstance(m, dict):
+                return None
+            roles.append(m.get("role"))
+        h.update(repr((example_id, roles)).encode("utf-8"))
+    return h.hexdigest()
+
+
 def compare_message_structures(
     orig_messages: List[Dict[str, Any]],
     transf_messages: List[Dict[str, Any]],
@@ -94,11 +134,11 @@ def compare_message_structures(
             )
             continue
 
-        orig_keys = set(o.keys())
-        transf_keys = set(t.keys())
-        if orig_keys != transf_keys:
-            missing = orig_keys - transf_keys
-            extra = transf_keys - orig_keys
+        # Compare the key views directly; the differences are only computed
+        # when the keys actually differ.
+        if o.keys() != t.keys():
+            missing = o.keys() - t.keys()
+            extra = t.keys() - o.keys()
             errors.append(
                 f"[example_id={example_id}, msg#{i}] message keys differ: "
                 f"missing_in_transformed={sorted(missing)}, "
@@ -129,6 +169,7 @@ def validate_structures(
     original_path: Path,
     transformed_path: Path,
     strict_ids: bool = False,
+    fast: bool = False,
 ) -> Tuple[
     bool,
     List[str],
@@ -139,12 +180,25 @@ def validate_structures(
     orig_records = load_as_dict(original_path)
     transf_records = load_as_dict(transformed_path)
 
-    errors: List[str] = []
-    orig_ids = set(orig_records.keys())
-    transf_ids = set(transf_records.keys())
+    if fast:
+        # Same ids and role sequences: accept without comparing every message.
+        orig_fp = structural_fingerprint(orig_records)
+        if orig_fp is not None and orig_fp == structural_fingerprint(transf_records):
+            return True, [], orig_records, transf_records, {}
 
-    missing_in_transformed = orig_ids - transf_ids
-    extra_in_transformed = transf_ids - orig_ids
+    errors: List[str] = []
+    # Split the ids in one pass over each index; membership tests go straight
+    # to the dicts, so no intermediate id sets are built.
+    common_ids: List[Any] = []
+    missing_in_transformed: List[Any] = []
+    for example_id in orig_records:
+        if example_id in transf_records:
+            common_ids.append(example_id)
+        else:
+            missing_in_transformed.append(example_id)
+    extra_in_transformed = [
+        example_id for example_id in transf_records if example_id not in orig_records
+    ]
 
     if missing_in_transformed:
         errors.append(
@@ -164,7 +218,7 @@ def validate_structures(
 
     per_example_errors: Dict[Any, List[str]] = {}
 
-    for example_id in sorted(orig_ids & transf_ids):
+    for example_id in sorted(common_ids):
         orig_item = orig_records[example_id]
         transf_item = transf_records[example_id]
 
@@ -189,79 +243,101 @@ def validate_structures(
     return ok, errors, orig_records, transf_records, per_example_errors
 
 
-def main() -> None:
-    args = parse_args()
-    original_path = Path(args.original)
-    transformed_path = Path(args.transformed)
+def default_clean_output_path(transformed_path: Path) -> Path:
+    """Return the default *_cleaned.json path next to transformed_path."""
+    if str(transformed_path).lower().endswith(".json"):
+        return transformed_path.with_name(transformed_path.stem + "_cleaned.json")
+    return transformed_path.with_name(transformed_path.name + "_cleaned")
+
+
+def clean(
+    original_path: Path,
+    transformed_path: Path,
+    clean_output: Optional[Path] = None,
+    strict_ids: bool = False,
+    fast: bool = False,
+) -> None:
+    """Write a cleaned transformed JSON containing only structurally valid examples.
 
+    This is the programmatic equivalent of running the script with --clean.
+    """
     (
-        ok,
-        errors,
+        _ok,
+        _errors,
         orig_records,
         transf_records,
         per_example_errors,
     ) = validate_structures(
         original_path=original_path,
         transformed_path=transformed_path,
-        strict_ids=args.strict_ids,
+        strict_ids=strict_ids,
+        fast=fast,
     )
 
-    if not args.clean:
-        if ok:
-            print(
-                "[validate] Structures match: message counts, keys, roles, and metadata fields are preserved."
-            )
-            return
-
-        print("[validate] Structural mismatches found:")
-        for e in errors:
-            print(" -", e)
-        raise SystemExit(1)
-
-    # Clean mode: drop structurally bad examples and write cleaned JSON.
-    # Determine output path.
-    if args.clean_output:
-        cleaned_path = Path(args.clean_output)
-    else:
-        transformed_str = str(transformed_path)
-        if transformed_str.lower().endswith(".json"):
-            cleaned_path = transformed_path.with_name(transformed_path.stem + "_cleaned.json")
-        else:
-            cleaned_path = transformed_path.with_name(transformed_path.name + "_cleaned")
-
-    orig_ids = set(orig_records.keys())
-    transf_ids = set(transf_records.keys())
+    cleaned_path = clean_output or default_clean_output_path(transformed_path)
 
-    bad_ids = set(per_example_errors.keys())
+    # If strict_ids is enabled, also treat extra IDs (not in the original) as
+    # bad. Missing IDs have no transformed record to drop in the first place.
+    kept = 0
 
-    # If strict_ids is enabled, also treat missing/extra IDs as bad.
-    if args.strict_ids:
-        missing_in_transformed = orig_ids - transf_ids
-        extra_in_transformed = transf_ids - orig_ids
-        bad_ids.update(missing_in_transformed)
-        bad_ids.update(extra_in_transformed)
+    def kept_records() -> Iterator[Dict[str, Any]]:
+        nonlocal kept
+        for ex_id, record in transf_records.items():
+            if ex_id in per_example_errors:
+                continue
+            if strict_ids and ex_id not in orig_records:
+                continue
+            kept += 1
+            yield record
 
-    kept_records = []
-    for ex_id, record in transf_records.items():
-        if ex_id in bad_ids:
-            continue
-        kept_records.append(record)
+    # Stream the kept records to disk instead of encoding them as one list.
+    write_json_array(cleaned_path, kept_records())
 
     total = len(transf_records)
-    kept = len(kept_records)
     dropped = total - kept
 
-    with cleaned_path.open("w", encoding="utf-8") as f:
-        json.dump(kept_records, f, ensure_ascii=False, indent=2)
-
     print(
         "[clean] Wrote cleaned transformed file:",
         cleaned_path,
         f"(total={total}, kept={kept}, dropped={dropped})",
     )
 
-    # Exit code: 0 as long as we successfully wrote the cleaned file.
-    # Callers can inspect the summary to decide how to treat dropped examples.
+
+def main() -> None:
+    args = parse_args()
+    original_path = Path(args.original)
+    transformed_path = Path(args.transformed)
+
+    if args.clean:
+        # Clean mode: drop structurally bad examples and write cleaned JSON.
+        # Exit code: 0 as long as we successfully wrote the cleaned file.
+        # Callers can inspect the summary to decide how to treat dropped examples.
+        clean(
+            original_path=original_path,
+            transformed_path=transformed_path,
+            clean_output=Path(args.clean_output) if args.clean_output else None,
+            strict_ids=args.strict_ids,
+            fast=args.fast,
+        )
+        return
+
+    ok, errors, _, _, _ = validate_structures(
+        original_path=original_path,
+        transformed_path=transformed_path,
+        strict_ids=args.strict_ids,
+        fast=args.fast,
+    )
+
+    if ok:
+        print(
+            "[validate] Structures match: message counts, keys, roles, and metadata fields are preserved."
+        )
+        return
+
+    print("[validate] Structural mismatches found:")
+    for e in errors:
+        print(" -", e)
+    raise SystemExit(1)
 
 
 if __name__ == "__main__":